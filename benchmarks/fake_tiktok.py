@@ -0,0 +1,260 @@
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# A local stand-in for the TikTok messages page. It reproduces only the DOM the bot depends on:
+# the absolute XPaths in main.py, the chat-list items, the nickname <p>, the chat header, the sonner toast and the passkey dialog.
+# It also stubs the JSON send endpoint used by the HTTP transport (TRANSPORT: "http").
+
+DEFAULT_PAGE_OPTIONS = {
+    "conversations": 200,
+    "latency_ms": 300,
+    "chat_latency_ms": 200,
+    "fail_rate": 0.0,
+    "api_latency_ms": 0,
+    "rerender": 0,
+    "toast": 0,
+    "toast_ms": 1500,
+    "passkey": 0,
+}
+
+MESSAGES_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Messages | Fake TikTok</title>
+<style>
+  body { font-family: sans-serif; margin: 0; }
+  [data-e2e='chat-list-item'] { padding: 6px; border-bottom: 1px solid #ddd; cursor: pointer; }
+  [contenteditable] { min-height: 24px; min-width: 300px; border: 1px solid #999; }
+  li[data-sonner-toast] { position: fixed; top: 8px; right: 8px; list-style: none; background: #333; color: #fff; padding: 8px; }
+  div[role='dialog'] { position: fixed; top: 30%; left: 30%; background: #fff; border: 1px solid #000; padding: 16px; }
+</style>
+</head>
+<body>
+<div id="app"></div>
+<script>
+var OPTIONS = __OPTIONS__;
+
+function el(tag, attrs, parent) {
+    var node = document.createElement(tag);
+    for (var key in (attrs || {})) { node.setAttribute(key, attrs[key]); }
+    if (parent) { parent.appendChild(node); }
+    return node;
+}
+
+function divs(parent, count) {
+    var last = null;
+    for (var i = 0; i < count; i++) { last = el('div', {}, parent); }
+    return last;
+}
+
+// #app/div[2]/div[1]/div/div[4]/div/div/div[2] is the conversation list container.
+var app = document.getElementById('app');
+el('div', {}, app);
+var layout = el('div', {}, app);
+var left = el('div', {}, layout);
+var leftInner = el('div', {}, left);
+divs(leftInner, 3);
+var listHolder = el('div', {}, el('div', {}, el('div', {}, leftInner)));
+el('div', {}, listHolder);
+var container = el('div', {}, listHolder);
+var chat = el('div', {id: 'main-content-messages'}, layout);
+
+function renderList() {
+    container.innerHTML = '';
+    for (var i = 0; i < OPTIONS.conversations; i++) {
+        var item = el('div', {'data-e2e': 'chat-list-item'}, container);
+        var nickname = el('p', {'class': 'css-1x2y3z-PInfoNickname e1abc0'}, item);
+        nickname.textContent = 'user' + i;
+        item.addEventListener('click', openChat.bind(null, i));
+    }
+}
+
+// Like TikTok, an open chat gets its own URL (?u=...) that opens it directly on the next visit.
+function openChat(index) {
+    if (Math.random() < OPTIONS.fail_rate) { return; }
+    var params = new URLSearchParams(location.search);
+    params.set('u', 'user' + index);
+    history.replaceState(null, '', location.pathname + '?' + params.toString());
+    setTimeout(function() { renderChat(index); }, OPTIONS.chat_latency_ms);
+    if (OPTIONS.rerender) { setTimeout(renderList, 50); }
+}
+
+// #main-content-messages/div/div[3]/div[4]/div is the click target and the write target sits below it.
+function renderChat(index) {
+    chat.innerHTML = '';
+    var panel = el('div', {}, chat);
+    el('p', {'data-e2e': 'chat-nickname'}, panel).textContent = 'user' + index;
+    var body = divs(panel, 3);
+    var clickTarget = el('div', {}, divs(body, 4));
+    var inputArea = divs(el('div', {}, el('div', {}, clickTarget)), 2);
+    var editor = el('div', {}, el('div', {}, divs(inputArea, 2)));
+    var write = el('div', {'contenteditable': 'true'}, el('div', {}, editor));
+    write.addEventListener('keydown', function(event) {
+        if (event.key !== 'Enter') { return; }
+        event.preventDefault();
+        var text = write.textContent;
+        if (!text.trim()) { return; }
+        write.textContent = '';
+        fetch('/api/sent', {method: 'POST', body: JSON.stringify({user: 'user' + index, text: text})});
+        if (OPTIONS.toast) { showToast(); }
+    });
+}
+
+function showToast() {
+    var toast = el('li', {'data-sonner-toast': ''}, document.body);
+    toast.textContent = 'Message sent';
+    setTimeout(function() { toast.remove(); }, OPTIONS.toast_ms);
+}
+
+function showPasskeyDialog() {
+    var dialog = el('div', {'role': 'dialog'}, document.body);
+    var button = el('button', {}, dialog);
+    button.textContent = 'Belki daha sonra';
+    button.addEventListener('click', function() { dialog.remove(); });
+}
+
+if (OPTIONS.passkey) { showPasskeyDialog(); }
+setTimeout(renderList, OPTIONS.latency_ms);
+var directUser = new URLSearchParams(location.search).get('u');
+if (directUser && /^user\\d+$/.test(directUser) && Number(directUser.slice(4)) < OPTIONS.conversations) {
+    setTimeout(function() { renderChat(Number(directUser.slice(4))); }, OPTIONS.latency_ms + OPTIONS.chat_latency_ms);
+}
+</script>
+</body>
+</html>
+"""
+
+EXPLORE_PAGE = "<!DOCTYPE html><html><head><title>Explore | Fake TikTok</title></head><body><div id='app'>explore</div></body></html>"
+
+
+def parse_page_options(query, defaults):
+    options = dict(defaults)
+    values = parse_qs(query)
+    for key, default in DEFAULT_PAGE_OPTIONS.items():
+        if key in values:
+            options[key] = type(default)(values[key][0])
+    return options
+
+
+class FakeTikTokServer:
+    def __init__(self, host="127.0.0.1", port=0, **page_options):
+        self.page_options = dict(DEFAULT_PAGE_OPTIONS, **page_options)
+        self.sent = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def messages_url(self):
+        return f"{self.base_url}/messages?lang=tr-TR"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-tiktok", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def record_sent(self, payload):
+        with self._lock:
+            self.sent.append(payload)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/messages":
+                    options = parse_page_options(url.query, server.page_options)
+                    self._reply(200, "text/html", MESSAGES_PAGE.replace("__OPTIONS__", json.dumps(options)))
+                elif url.path == "/explore":
+                    self._reply(200, "text/html", EXPLORE_PAGE)
+                else:
+                    self._reply(404, "text/plain", "not found")
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                if path not in ("/api/sent", "/api/im/message/send"):
+                    self._reply(404, "text/plain", "not found")
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._reply(400, "text/plain", "invalid json")
+                    return
+                if path == "/api/sent":
+                    server.record_sent(dict(payload, transport="browser"))
+                    self._reply(204, "text/plain", "")
+                else:
+                    self._send_over_api(payload)
+
+            def _send_over_api(self, payload):
+                time.sleep(server.page_options["api_latency_ms"] / 1000)
+                if "sessionid=" not in (self.headers.get("Cookie") or ""):
+                    self._reply_json(401, {"error": "not logged in"})
+                    return
+                if random.random() < server.page_options["fail_rate"]:
+                    self._reply_json(503, {"error": "try again later"})
+                    return
+                match = re.fullmatch(r"user(\d+)", str(payload.get("to", "")))
+                if not match or int(match.group(1)) >= server.page_options["conversations"]:
+                    self._reply_json(404, {"error": "unknown user"})
+                    return
+                if not str(payload.get("text", "")).strip():
+                    self._reply_json(400, {"error": "empty message"})
+                    return
+                server.record_sent({"user": payload["to"], "text": payload["text"], "transport": "http"})
+                self._reply_json(200, {"status": "sent"})
+
+            def _reply_json(self, status, payload):
+                self._reply(status, "application/json", json.dumps(payload))
+
+            def _reply(self, status, content_type, body):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local fake TikTok messages page.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--conversations", type=int, default=DEFAULT_PAGE_OPTIONS["conversations"])
+    parser.add_argument("--latency-ms", type=int, default=DEFAULT_PAGE_OPTIONS["latency_ms"])
+    parser.add_argument("--fail-rate", type=float, default=DEFAULT_PAGE_OPTIONS["fail_rate"])
+    parser.add_argument("--rerender", action="store_true")
+    parser.add_argument("--toast", action="store_true")
+    parser.add_argument("--passkey", action="store_true")
+    args = parser.parse_args()
+
+    fake = FakeTikTokServer(port=args.port, conversations=args.conversations, latency_ms=args.latency_ms,
+                            fail_rate=args.fail_rate, rerender=int(args.rerender), toast=int(args.toast), passkey=int(args.passkey))
+    print(f"Serving fake TikTok messages page at {fake.messages_url()} (Ctrl+C to stop)")
+    try:
+        fake._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake._httpd.server_close()
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from fake_tiktok import FakeTikTokServer
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def pick_target_users(conversations, users):
+    # Spread the targets over the whole list so lookups don't all hit the top of the inbox.
+    step = max(1, conversations // max(1, users))
+    return [f"user{i}" for i in range(0, conversations, step)][:users]
+
+
+def write_benchmark_config(workdir, server, args):
+    config = {
+        "TEST_MODE": True,
+        "TARGET_USERS": pick_target_users(args.conversations, args.users),
+        "MESSAGE_TO_SEND": ".",
+        "COOKIES_FILE": "cookies.json",
+        "LOG_FILENAME": "benchmark_bot.txt",
+        "TIKTOK_MESSAGES_URL": server.messages_url(),
+        "HEADLESS_MODE": not args.headed,
+        "LATENCY_BUDGET_MODE": args.latency_budget,
+        "JOURNAL_FILE": None,
+        "TRANSPORT": args.transport,
+        "HTTP_TRANSPORT": {"BASE_URL": server.base_url},
+        "TAB_CONCURRENCY": args.tabs,
+        "CONVERSATION_CACHE_FILE": None if args.no_conversation_cache else "conversation_cache.json",
+        "METRICS_JSON_DIR": "metrics",
+        "RETRY_POLICY": {"MAX_ATTEMPTS": args.max_attempts},
+    }
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
+    cookies = [{"name": "sessionid", "value": "benchmark", "domain": "127.0.0.1", "path": "/"}]
+    with open(os.path.join(workdir, "cookies.json"), "w", encoding="utf-8") as f:
+        json.dump(cookies, f)
+
+
+def load_run_metrics(workdir, seen):
+    paths = sorted(set(glob.glob(os.path.join(workdir, "metrics", "run-*.json"))) - seen)
+    seen.update(paths)
+    runs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            runs.append(json.load(f))
+    return runs
+
+
+def print_report(runs, server, args, wall_seconds):
+    sent = sum(run["summary"]["sent"] for run in runs)
+    attempted = sum(len(run["users"]) for run in runs)
+    round_trips = sum(run["round_trips"] for run in runs)
+    run_seconds = sum(run["duration"] for run in runs)
+    user_seconds = [user["seconds"] for run in runs for user in run["users"]]
+
+    print()
+    print(f"Benchmark: {len(runs)} run(s), {args.conversations} conversations, {args.users} target users, "
+          f"render latency {args.latency_ms}ms, fail rate {args.fail_rate:.0%}, "
+          f"{'latency budget' if args.latency_budget else 'standard'} mode")
+    print(f"  sent (bot)            {sent}/{attempted}")
+    print(f"  sent (server saw)     {len(server.sent)}")
+    print(f"  users/minute          {sent / run_seconds * 60 if run_seconds else 0:.2f}")
+    print(f"  round trips/user      {round_trips / attempted if attempted else 0:.1f}")
+    print(f"  per-user latency      p50 {percentile(user_seconds, 50):.2f}s  p95 {percentile(user_seconds, 95):.2f}s")
+    print(f"  wall time             {wall_seconds:.1f}s")
+    print("  per-phase latency (per run):")
+    phases = []
+    for run in runs:
+        for phase in run["phases"]:
+            if phase not in phases:
+                phases.append(phase)
+    for phase in phases:
+        values = [run["phases"].get(phase, 0.0) for run in runs]
+        print(f"    {phase:<18} p50 {percentile(values, 50):7.2f}s  p95 {percentile(values, 95):7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's send pipeline against a local fake TikTok page.")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--latency-ms", type=int, default=300)
+    parser.add_argument("--chat-latency-ms", type=int, default=200)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--rerender", action="store_true", help="re-render the conversation list after every click")
+    parser.add_argument("--toast", action="store_true", help="show a sonner toast after every sent message")
+    parser.add_argument("--passkey", action="store_true", help="show the passkey dialog on load")
+    parser.add_argument("--latency-budget", action="store_true", help="run with LATENCY_BUDGET_MODE enabled")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--tabs", type=int, default=1, help="conversations open at once per browser (TAB_CONCURRENCY)")
+    parser.add_argument("--transport", choices=("browser", "http"), default="browser", help="send through Chrome or the stubbed HTTP endpoint")
+    parser.add_argument("--no-conversation-cache", action="store_true", help="always scan the conversation list instead of reusing cached chat URLs")
+    parser.add_argument("--chromedriver", help="path to a chromedriver binary (skips webdriver-manager)")
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeTikTokServer(conversations=args.conversations, latency_ms=args.latency_ms, chat_latency_ms=args.chat_latency_ms,
+                              fail_rate=args.fail_rate, rerender=int(args.rerender), toast=int(args.toast), passkey=int(args.passkey)).start()
+    workdir = tempfile.mkdtemp(prefix="tiktok-bench-")
+    write_benchmark_config(workdir, server, args)
+    os.chdir(workdir)
+
+    from tiktok_streak_bot import browser, load_config, run_bot
+    from tiktok_streak_bot.logs import configure_logging
+    config = load_config()
+    configure_logging(config)
+    if args.chromedriver:
+        browser._chromedriver_path = args.chromedriver
+
+    runs = []
+    seen = set()
+    started = time.perf_counter()
+    try:
+        for iteration in range(args.iterations):
+            print(f"--- Benchmark iteration {iteration + 1}/{args.iterations} ---")
+            run_bot(config)
+            runs.extend(load_run_metrics(workdir, seen))
+    finally:
+        server.stop()
+    print_report(runs, server, args, time.perf_counter() - started)
+    print(f"Logs and metrics are in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+from tiktok_streak_bot.config import Config, get_accounts
+from tiktok_streak_bot.metrics import new_run_metrics
+from tiktok_streak_bot.runner import send_to_users
+from tiktok_streak_bot.transports import HttpTransport, TransportUnavailable, DeliveryUnconfirmed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_tiktok import FakeTikTokServer
+
+
+class HttpTransportTests(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+
+    def transport(self, cookie_domain="127.0.0.1", timeout=5, **page_options):
+        server = FakeTikTokServer(conversations=10, **page_options).start()
+        self.addCleanup(server.stop)
+        cookies_file = os.path.join(self.workdir, "cookies.json")
+        with open(cookies_file, "w", encoding="utf-8") as f:
+            json.dump([{"name": "sessionid", "value": "test", "domain": cookie_domain, "path": "/"}], f)
+        config = Config({"TARGET_USERS": ["user1"], "COOKIES_FILE": cookies_file, "COOKIE_CACHE_FILE": None, "JOURNAL_FILE": None,
+                         "METRICS_JSON_DIR": None, "HTTP_TRANSPORT": {"BASE_URL": server.base_url, "TIMEOUT_SECONDS": timeout}})
+        account = get_accounts(config)[0]
+        return server, config, account, HttpTransport(config, account, new_run_metrics(account["NAME"]))
+
+    def test_sent(self):
+        server, _, _, transport = self.transport()
+        self.assertEqual(transport.send("user1"), "sent")
+        self.assertEqual([entry["user"] for entry in server.sent], ["user1"])
+
+    def test_unknown_user_is_left_to_the_browser(self):
+        server, config, account, transport = self.transport()
+        self.assertEqual(transport.send("stranger"), "not_found")
+
+        summary = {"sent": 0, "failed": 0, "unconfirmed": 0, "results": {}}
+        fallback = []
+        send_to_users(config, transport, ["stranger"], account, "2026-10-17", summary, transport.metrics, {}, fallback)
+        self.assertEqual(fallback, ["stranger"])
+        self.assertEqual(summary["results"], {})
+        self.assertEqual(server.sent, [])
+
+    def test_session_rejected(self):
+        # The cookie belongs to another host, so the request arrives without a session and gets a 401.
+        _, _, _, transport = self.transport(cookie_domain=".tiktok.com")
+        with self.assertRaisesRegex(TransportUnavailable, "HTTP 401"):
+            transport.send("user1")
+
+    def test_endpoint_unavailable(self):
+        server, _, _, transport = self.transport(fail_rate=1.0)
+        with self.assertRaisesRegex(TransportUnavailable, "HTTP 503"):
+            transport.send("user1")
+        self.assertEqual(server.sent, [])
+
+    def test_read_timeout_is_unconfirmed(self):
+        # The POST reached the server, so the message may have gone out: it must not be retried or handed to the browser.
+        _, _, _, transport = self.transport(timeout=1, api_latency_ms=1500)
+        with self.assertRaises(DeliveryUnconfirmed):
+            transport.send("user1")
+
+if __name__ == "__main__":
+    unittest.main()
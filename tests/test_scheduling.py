@@ -0,0 +1,128 @@
+import unittest
+from datetime import datetime, time as dt_time, timezone
+from zoneinfo import ZoneInfo
+
+from tiktok_streak_bot.config import Config, get_accounts
+from tiktok_streak_bot.scheduler import next_slot_after, build_schedule_jobs, collect_due_accounts, job_start
+from tiktok_streak_bot.planner import DEFAULT_SETUP_SECONDS, DEFAULT_USER_SECONDS, plan_run
+
+
+ISTANBUL = ZoneInfo("Europe/Istanbul")
+BERLIN = ZoneInfo("Europe/Berlin")
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+def make_config(**settings):
+    # No journal: the planner predicts from its defaults.
+    return Config(dict({"TARGET_USERS": ["user1", "user2"], "JOURNAL_FILE": None, "METRICS_JSON_DIR": None, "TIMEZONE": "Europe/Istanbul"}, **settings))
+
+class NextSlotTests(unittest.TestCase):
+    def test_later_today(self):
+        # Istanbul is UTC+3 all year.
+        self.assertEqual(next_slot_after(dt_time(22, 0), ISTANBUL, utc(2026, 10, 17, 12, 0)), utc(2026, 10, 17, 19, 0))
+
+    def test_rolls_over_to_tomorrow(self):
+        self.assertEqual(next_slot_after(dt_time(0, 2), ISTANBUL, utc(2026, 10, 17, 12, 0)), utc(2026, 10, 17, 21, 2))
+
+    def test_slot_itself_is_not_next(self):
+        self.assertEqual(next_slot_after(dt_time(22, 0), ISTANBUL, utc(2026, 10, 17, 19, 0)), utc(2026, 10, 18, 19, 0))
+
+    def test_keeps_local_time_across_dst(self):
+        # Berlin switches from CEST (UTC+2) to CET (UTC+1) on 2026-10-25.
+        before = next_slot_after(dt_time(0, 2), BERLIN, utc(2026, 10, 24, 12, 0))
+        after = next_slot_after(dt_time(0, 2), BERLIN, before)
+        self.assertEqual(before, utc(2026, 10, 24, 22, 2))
+        self.assertEqual(after, utc(2026, 10, 25, 23, 2))
+        self.assertEqual(after.astimezone(BERLIN).time(), dt_time(0, 2))
+
+class CollectDueTests(unittest.TestCase):
+    def jobs(self, config, last_slot, now):
+        key = f"default@{config.TARGET_SEND_TIME.strftime('%H:%M')}"
+        return build_schedule_jobs(get_accounts(config), {key: last_slot}, now)
+
+    def test_on_time(self):
+        config = make_config(TARGET_SEND_TIME_HM=[22, 0])
+        jobs = self.jobs(config, utc(2026, 10, 16, 19, 0), utc(2026, 10, 17, 18, 0))
+        self.assertEqual(collect_due_accounts(config, jobs, utc(2026, 10, 17, 19, 1)), get_accounts(config))
+        self.assertEqual(jobs[0]['last_slot'], utc(2026, 10, 17, 19, 0))
+        self.assertEqual(jobs[0]['next_slot'], utc(2026, 10, 18, 19, 0))
+
+    def test_catch_up_once_within_window(self):
+        config = make_config(TARGET_SEND_TIME_HM=[22, 0], CATCH_UP_POLICY="once", CATCH_UP_WINDOW_MINUTES=180)
+        jobs = self.jobs(config, utc(2026, 10, 16, 19, 0), utc(2026, 10, 17, 18, 0))
+        self.assertEqual(len(collect_due_accounts(config, jobs, utc(2026, 10, 17, 21, 0))), 1)
+
+    def test_catch_up_once_outside_window(self):
+        config = make_config(TARGET_SEND_TIME_HM=[22, 0], CATCH_UP_POLICY="once", CATCH_UP_WINDOW_MINUTES=60)
+        jobs = self.jobs(config, utc(2026, 10, 16, 19, 0), utc(2026, 10, 17, 18, 0))
+        self.assertEqual(collect_due_accounts(config, jobs, utc(2026, 10, 17, 21, 0)), [])
+        self.assertEqual(jobs[0]['next_slot'], utc(2026, 10, 18, 19, 0))
+
+    def test_skip_policy(self):
+        config = make_config(TARGET_SEND_TIME_HM=[22, 0], CATCH_UP_POLICY="skip")
+        jobs = self.jobs(config, utc(2026, 10, 16, 19, 0), utc(2026, 10, 17, 18, 0))
+        self.assertEqual(collect_due_accounts(config, jobs, utc(2026, 10, 17, 21, 0)), [])
+
+    def test_several_missed_slots_run_once(self):
+        config = make_config(TARGET_SEND_TIME_HM=[22, 0], CATCH_UP_WINDOW_MINUTES=180)
+        jobs = self.jobs(config, utc(2026, 10, 14, 19, 0), utc(2026, 10, 17, 20, 0))
+        self.assertEqual(len(collect_due_accounts(config, jobs, utc(2026, 10, 17, 20, 0))), 1)
+        self.assertEqual(jobs[0]['last_slot'], utc(2026, 10, 17, 19, 0))
+
+    def test_early_start(self):
+        config = make_config(TARGET_SEND_TIME_HM=[22, 0])
+        jobs = self.jobs(config, utc(2026, 10, 16, 19, 0), utc(2026, 10, 17, 12, 0))
+        jobs[0]['start_at'] = utc(2026, 10, 17, 18, 30)
+        self.assertEqual(len(collect_due_accounts(config, jobs, utc(2026, 10, 17, 18, 31))), 1)
+        self.assertEqual(jobs[0]['last_slot'], utc(2026, 10, 17, 19, 0))
+        # A restart after the early run must not repeat the slot.
+        restarted = build_schedule_jobs(get_accounts(config), {jobs[0]['key']: jobs[0]['last_slot']}, utc(2026, 10, 17, 18, 40))
+        self.assertEqual(restarted[0]['next_slot'], utc(2026, 10, 18, 19, 0))
+
+class PlanRunTests(unittest.TestCase):
+    def plan(self, users, slot, now, **settings):
+        config = make_config(TARGET_USERS=users, **settings)
+        account = get_accounts(config)[0]
+        return plan_run(config, account, users, slot, now)
+
+    def test_deadline_on_next_day_keeps_the_slot(self):
+        # 22:00 send time, 06:00 deadline: the deadline's day starts after the slot, which must not delay the run.
+        slot = utc(2026, 10, 17, 19, 0)
+        plan = self.plan(["user1", "user2"], slot, utc(2026, 10, 17, 12, 0), TARGET_SEND_TIME_HM=[22, 0], SEND_DEADLINE_HM=[6, 0])
+        self.assertEqual(plan['deadline'], utc(2026, 10, 18, 3, 0))
+        self.assertEqual(plan['start_at'], slot)
+        self.assertGreater(plan['slack_seconds'], 0)
+
+        config = make_config(TARGET_SEND_TIME_HM=[22, 0], SEND_DEADLINE_HM=[6, 0])
+        jobs = build_schedule_jobs(get_accounts(config), {}, utc(2026, 10, 17, 12, 0))
+        jobs[0]['start_at'] = plan['start_at']
+        self.assertEqual(job_start(jobs[0]), slot)
+
+    def test_moves_start_earlier_to_fit(self):
+        users = [f"user{i}" for i in range(20)]
+        slot = utc(2026, 10, 17, 20, 30)
+        plan = self.plan(users, slot, utc(2026, 10, 17, 12, 0), TARGET_SEND_TIME_HM=[23, 30], SEND_DEADLINE_HM=[23, 50],
+                         DEADLINE_SAFETY_MARGIN_MINUTES=10)
+        predicted = DEFAULT_SETUP_SECONDS + 20 * DEFAULT_USER_SECONDS + 19 * 10.0
+        self.assertEqual(plan['predicted_seconds'], predicted)
+        self.assertEqual((plan['deadline'] - plan['start_at']).total_seconds(), predicted + 600)
+        self.assertLess(plan['start_at'], slot)
+        self.assertEqual(plan['slack_seconds'], 0)
+
+    def test_does_not_fit(self):
+        users = [f"user{i}" for i in range(20)]
+        now = utc(2026, 10, 17, 20, 35)
+        plan = self.plan(users, utc(2026, 10, 17, 20, 40), now, TARGET_SEND_TIME_HM=[23, 40], SEND_DEADLINE_HM=[23, 50])
+        self.assertEqual(plan['start_at'], now)
+        self.assertLess(plan['slack_seconds'], 0)
+
+    def test_never_starts_before_the_streak_day(self):
+        users = [f"user{i}" for i in range(3000)]
+        plan = self.plan(users, utc(2026, 10, 17, 21, 30), utc(2026, 10, 17, 12, 0), TARGET_SEND_TIME_HM=[0, 30], SEND_DEADLINE_HM=[23, 50])
+        # Local midnight of 2026-10-18 in Istanbul.
+        self.assertEqual(plan['start_at'], utc(2026, 10, 17, 21, 0))
+        self.assertLess(plan['slack_seconds'], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import importlib
+
+from .config import DEFAULT_CONFIG, Config, ConfigError, load_config, get_accounts
+
+
+# Importing the package stays cheap: Selenium, psutil and urllib3 are only loaded once something that needs them is used.
+_LAZY_EXPORTS = {
+    "run_bot": "runner",
+    "run_account": "runner",
+    "run_all_accounts": "runner",
+    "run_scheduler": "scheduler",
+    "run_daemon": "daemon",
+    "check_cookie_file": "cookies",
+    "print_journal_report": "journal",
+}
+
+__all__ = ["DEFAULT_CONFIG", "Config", "ConfigError", "load_config", "get_accounts"] + list(_LAZY_EXPORTS)
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,503 @@
+import os
+import sys
+import json
+import shutil
+import atexit
+import fnmatch
+import logging
+import platform
+import tempfile
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+import psutil
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+os.environ['WDM_LOG'] = '0'
+from webdriver_manager.chrome import ChromeDriverManager
+
+from .cookies import load_normalized_cookies, drop_expired_cookies
+from .pages import human_pause
+
+
+PROCESS_EXIT_GRACE_SECONDS = 3
+PROCESS_KILL_WAIT_SECONDS = 2
+
+def browser_process_tree(driver):
+    # chromedriver is the service process; Chrome and all of its helpers are its descendants.
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        return [root] + root.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return []
+
+def reap_process_tree(processes):
+    # psutil.Process.is_running() also checks the creation time, so a recycled PID is never touched.
+    alive = [process for process in processes if process.is_running()]
+    if not alive:
+        return
+    _, alive = psutil.wait_procs(alive, timeout=PROCESS_EXIT_GRACE_SECONDS)
+    if not alive:
+        return
+    logging.warning(f"{len(alive)} browser process(es) still running after shutdown. Terminating them...")
+    for process in alive:
+        try:
+            process.terminate()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(alive, timeout=PROCESS_KILL_WAIT_SECONDS)
+    for process in alive:
+        try:
+            logging.warning(f"Killing browser process {process.pid}.")
+            process.kill()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(alive, timeout=PROCESS_KILL_WAIT_SECONDS)
+    if alive:
+        logging.error(f"Could not stop browser process(es): {', '.join(str(process.pid) for process in alive)}")
+
+def quit_driver(driver, processes=()):
+    # Snapshot the tree before quitting: once chromedriver exits, orphaned Chrome processes can't be found through it anymore.
+    tracked = {process.pid: process for process in list(processes) + browser_process_tree(driver)}
+    try:
+        driver.quit()
+    except Exception as e:
+        logging.warning(f"Error during driver.quit() (might be already closed): {e}")
+    reap_process_tree(list(tracked.values()))
+
+def to_cdp_cookie(cookie):
+    cdp_cookie = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite') if key in cookie}
+    if 'expiry' in cookie:
+        cdp_cookie['expires'] = cookie['expiry']
+    return cdp_cookie
+
+def inject_cookies_cdp(driver, cookies):
+    try:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': [to_cdp_cookie(cookie) for cookie in cookies]})
+        logging.info(f"Successfully added {len(cookies)} cookies in one DevTools call.")
+        return True
+    except (WebDriverException, AttributeError) as e:
+        logging.warning(f"Bulk cookie injection through DevTools failed ({type(e).__name__}). Falling back to one-by-one injection.")
+        return False
+
+def inject_cookies_classic(config, driver, cookies):
+    cookies_added_count = 0
+    cookies_failed_count = 0
+
+    driver.get(config.TIKTOK_EXPLORE_URL)
+    logging.info(f"Navigated to main domain: {driver.current_url}. Waiting before adding cookies...")
+    human_pause(config, 3, 5)
+    logging.info(f"Starting to add cookies (Browser at {driver.current_url})")
+
+    for i, cookie_to_add in enumerate(cookies):
+        try:
+            logging.debug("Attempting to add cookie #%d: %s", i + 1, cookie_to_add)
+            driver.add_cookie(cookie_to_add)
+            cookies_added_count += 1
+        except Exception as e:
+            cookies_failed_count += 1
+            logging.warning(f"Failed to add cookie C#{i+1} ('{cookie_to_add.get('name', 'N/A')}'). Error: {type(e).__name__}")
+            logging.debug("Failed cookie details: %s", cookie_to_add)
+
+    if cookies_failed_count > 0:
+        logging.warning(f"{cookies_failed_count} cookies failed to load.")
+    if cookies_added_count > 0:
+         logging.info(f"Successfully added {cookies_added_count} cookies.")
+         return True
+    else:
+         logging.error("No cookies were added!")
+         return False
+
+def load_cookies(config, driver, cookie_file):
+    logging.info(f"Loading cookies from '{cookie_file}'...")
+    try:
+        cookies, invalid = load_normalized_cookies(config, cookie_file)
+        if invalid:
+            logging.warning(f"{invalid} cookies failed to load.")
+        cookies = drop_expired_cookies(cookies)
+        if not cookies:
+            logging.error("No cookies were added!")
+            return False
+
+        if config.CDP_COOKIE_INJECTION and inject_cookies_cdp(driver, cookies):
+            return True
+        return inject_cookies_classic(config, driver, cookies)
+    except FileNotFoundError:
+        logging.error(f"Cookie file not found: {cookie_file}")
+        return False
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        logging.error(f"Cookie file is not valid JSON: {cookie_file}")
+        return False
+    except Exception as e:
+        logging.error(f"Unexpected error during cookie loading:")
+        logging.exception(e)
+        return False
+
+def is_arm_architecture():
+    machine_arch = platform.machine().lower()
+    return 'arm' in machine_arch or 'aarch64' in machine_arch
+
+_chromedriver_lock = threading.Lock()
+_chromedriver_path = None
+
+def get_chromedriver_path():
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+_warm_sessions = {}
+_warm_sessions_lock = threading.Lock()
+
+def get_profile_dir(config, account_name):
+    if not config.PERSISTENT_PROFILE_DIR:
+        return None
+    return os.path.abspath(os.path.join(config.PERSISTENT_PROFILE_DIR, account_name))
+
+def is_profile_in_use(profile_dir, error):
+    # Chrome refuses a profile another Chrome still holds. On Linux and macOS the holder is in the SingletonLock link ("host-pid").
+    if "already in use" in str(error):
+        return True
+    try:
+        pid = int(os.readlink(os.path.join(profile_dir, "SingletonLock")).rsplit("-", 1)[1])
+    except (OSError, ValueError, IndexError):
+        return False
+    return psutil.pid_exists(pid)
+
+def quarantine_profile(profile_dir):
+    destination = f"{profile_dir}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    try:
+        os.rename(profile_dir, destination)
+        logging.warning(f"Moved the broken profile aside to '{destination}'. A fresh one is created on the next run.")
+    except OSError as e:
+        logging.error(f"Could not move the broken profile '{profile_dir}' aside: {e}")
+
+def is_driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def take_warm_session(profile_dir):
+    with _warm_sessions_lock:
+        driver = _warm_sessions.pop(profile_dir, None)
+    if driver is None:
+        return None
+    if is_driver_alive(driver):
+        logging.info(f"Reusing warm browser session for profile: {profile_dir}")
+        return driver
+    logging.warning("Warm browser session is no longer responsive. Starting a new one.")
+    quit_driver(driver)
+    return None
+
+def keep_warm_session(config, profile_dir, driver):
+    # Least recently used first. No more browsers stay open than could ever run at once.
+    with _warm_sessions_lock:
+        _warm_sessions.pop(profile_dir, None)
+        _warm_sessions[profile_dir] = driver
+        evicted = []
+        while len(_warm_sessions) > config.MAX_PARALLEL_ACCOUNTS:
+            oldest = next(iter(_warm_sessions))
+            evicted.append((oldest, _warm_sessions.pop(oldest)))
+    logging.info("Keeping browser session warm for the next run.")
+    for oldest, stale in evicted:
+        logging.info(f"Closing the least recently used warm browser session ({oldest}) to stay within MAX_PARALLEL_ACCOUNTS.")
+        quit_driver(stale)
+
+def close_warm_sessions():
+    with _warm_sessions_lock:
+        drivers = list(_warm_sessions.values())
+        _warm_sessions.clear()
+    for driver in drivers:
+        quit_driver(driver)
+
+atexit.register(close_warm_sessions)
+
+LOW_MEMORY_CHROME_ARGUMENTS = (
+    "--renderer-process-limit=2",
+    "--disable-features=site-per-process,IsolateOrigins,Translate,BackForwardCache,MediaRouter,OptimizationHints,InterestFeedContentSuggestions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-sync",
+    "--no-first-run",
+    "--disable-dev-shm-usage",
+    "--disk-cache-size=16777216",
+    "--media-cache-size=1048576",
+    "--js-flags=--max-old-space-size=512",
+)
+
+def build_chrome_options(config, headless, user_agent, user_data_dir):
+    chrome_options = Options()
+    if headless:
+        logging.info("Running in HEADLESS mode.")
+        chrome_options.add_argument("--headless=new")
+    else:
+        logging.info("Running in standard (non-headless) mode.")
+
+    chrome_options.add_argument(f"user-agent={user_agent}")
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    chrome_options.page_load_strategy = config.PAGE_LOAD_STRATEGY
+    if config.LEAN_MODE:
+        # Images are blocked through LEAN_BLOCK_PATTERNS only, so LEAN_UNBLOCK_PATTERNS can still remove that pattern.
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+    if config.TAB_CONCURRENCY > 1:
+        # Background tabs keep loading and rendering at full speed while another tab is being worked on.
+        chrome_options.add_argument("--disable-background-timer-throttling")
+        chrome_options.add_argument("--disable-renderer-backgrounding")
+        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    if config.LOW_MEMORY_MODE:
+        for argument in LOW_MEMORY_CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
+    if config.NETWORK_REPORT:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return chrome_options
+
+def browser_rss_bytes(driver):
+    total = 0
+    for process in browser_process_tree(driver):
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+def start_memory_watchdog(config, driver):
+    watchdog = {"stop": threading.Event(), "current": 0, "peak": 0, "samples": 0, "thread": None}
+
+    def sample():
+        rss = browser_rss_bytes(driver)
+        watchdog['current'] = rss
+        watchdog['peak'] = max(watchdog['peak'], rss)
+        watchdog['samples'] += 1
+
+    def watch():
+        while not watchdog['stop'].wait(config.MEMORY_SAMPLE_SECONDS):
+            sample()
+
+    watchdog['sample'] = sample
+    if config.MEMORY_SAMPLE_SECONDS:
+        sample()
+        watchdog['thread'] = threading.Thread(target=watch, name=f"{threading.current_thread().name}-memory", daemon=True)
+        watchdog['thread'].start()
+    return watchdog
+
+def stop_memory_watchdog(watchdog, metrics):
+    watchdog['stop'].set()
+    if watchdog['thread'] is None:
+        return
+    watchdog['thread'].join(timeout=5)
+    peak_mb = watchdog['peak'] / 1048576
+    metrics['memory_peak_mb'] = round(max(metrics.get('memory_peak_mb', 0.0), peak_mb), 1)
+    logging.info(f"Browser memory: peak {peak_mb:.0f} MB RSS across the chromedriver/Chrome process tree ({watchdog['samples']} samples).")
+
+def memory_over_ceiling(config, watchdog):
+    if not config.MEMORY_CEILING_MB or watchdog['thread'] is None:
+        return False
+    watchdog['sample']()
+    current_mb = watchdog['current'] / 1048576
+    if current_mb <= config.MEMORY_CEILING_MB:
+        return False
+    logging.warning(f"Browser is using {current_mb:.0f} MB RSS, above MEMORY_CEILING_MB ({config.MEMORY_CEILING_MB:.0f} MB). Recycling it before the next user.")
+    return True
+
+def lean_blocked_patterns(config):
+    # Network.setBlockedURLs has no exceptions and Selenium can't answer Fetch.requestPaused events, so there is no per-URL allow-list.
+    # LEAN_UNBLOCK_PATTERNS names block patterns to leave out instead ('*' matches any part of a block pattern).
+    blocked = []
+    for pattern in config.LEAN_BLOCK_PATTERNS:
+        if any(fnmatch.fnmatchcase(pattern, unblock) for unblock in config.LEAN_UNBLOCK_PATTERNS):
+            logging.debug("Lean mode: not blocking '%s', it matches LEAN_UNBLOCK_PATTERNS.", pattern)
+            continue
+        blocked.append(pattern)
+    return blocked
+
+def apply_lean_mode(config, driver):
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': lean_blocked_patterns(config)})
+        # Debug only: it runs again for every tab in multi-tab mode.
+        logging.debug("Lean mode request blocking enabled.")
+    except (WebDriverException, AttributeError) as e:
+        logging.warning(f"Could not enable lean mode request blocking ({type(e).__name__}). Continuing with a full page load.")
+
+PAGE_LOAD_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+if (!nav) { return null; }
+return {load_ms: nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : performance.now(), dom_ready_ms: nav.domContentLoadedEventEnd - nav.startTime};
+"""
+
+def measure_page_load(driver):
+    try:
+        return driver.execute_script(PAGE_LOAD_SCRIPT)
+    except WebDriverException as e:
+        logging.debug("Could not read navigation timing: %s", e)
+        return None
+
+def collect_network_usage(driver):
+    usage = {"bytes": 0, "requests": 0, "blocked": 0}
+    try:
+        entries = driver.get_log('performance')
+    except (WebDriverException, ValueError) as e:
+        logging.debug("Performance log not available: %s", e)
+        return None
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method = message.get('method')
+        if method == 'Network.loadingFinished':
+            usage['requests'] += 1
+            usage['bytes'] += int(message['params'].get('encodedDataLength', 0))
+        elif method == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            usage['blocked'] += 1
+    return usage
+
+def report_network_usage(config, driver, metrics, page_load):
+    usage = collect_network_usage(driver)
+    if usage is None:
+        return
+    usage['page_load_ms'] = round(page_load['load_ms']) if page_load else None
+    usage['lean_mode'] = bool(config.LEAN_MODE)
+    metrics['network'] = usage
+    logging.info(f"Network: {usage['bytes'] / 1048576:.2f} MB in {usage['requests']} requests, {usage['blocked']} blocked. Messages page load: {usage['page_load_ms']} ms.")
+
+    baseline_path = os.path.join(config.METRICS_JSON_DIR or ".", "network_baseline.json")
+    try:
+        if not config.LEAN_MODE:
+            os.makedirs(config.METRICS_JSON_DIR or ".", exist_ok=True)
+            with open(baseline_path, 'w', encoding='utf-8') as f:
+                json.dump(usage, f)
+            return
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        logging.info("No full-page baseline yet. Run once with NETWORK_REPORT on and LEAN_MODE off to see the savings.")
+        return
+    except (IOError, ValueError) as e:
+        logging.debug("Network baseline not usable: %s", e)
+        return
+    saved_mb = (baseline['bytes'] - usage['bytes']) / 1048576
+    message = f"Lean mode saved {saved_mb:.2f} MB ({baseline['bytes'] / 1048576:.2f} MB -> {usage['bytes'] / 1048576:.2f} MB)"
+    if baseline.get('page_load_ms') and usage['page_load_ms']:
+        message += f" and {(baseline['page_load_ms'] - usage['page_load_ms']) / 1000:.1f}s of messages page load time"
+    logging.info(message + " compared to the last full run.")
+
+def is_session_logged_in(config, driver):
+    try:
+        logging.info(f"Checking whether the existing session is still logged in ({config.TIKTOK_MESSAGES_URL})...")
+        driver.get(config.TIKTOK_MESSAGES_URL)
+        if "login" in driver.current_url.lower():
+            logging.info("Redirected to the login page. Session is not logged in.")
+            return False
+        if driver.get_cookie("sessionid") is None:
+            logging.info("No 'sessionid' cookie in the profile. Session is not logged in.")
+            return False
+        logging.info("Existing session is still logged in.")
+        return True
+    except Exception as e:
+        logging.warning(f"Could not verify the existing session: {e}")
+        return False
+
+@contextmanager
+def managed_webdriver(config, headless, user_agent, profile_dir=None, keep_alive=False):
+    driver = take_warm_session(profile_dir) if profile_dir and keep_alive else None
+    if driver is not None:
+        failed = False
+        try:
+            yield driver
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            if failed or getattr(driver, 'recycle_requested', False):
+                logging.warning("Closing the warm browser session.")
+                quit_driver(driver)
+            else:
+                keep_warm_session(config, profile_dir, driver)
+        return
+
+    if is_arm_architecture():
+        try:
+            get_chromedriver_path()
+        except Exception as e:
+            logging.critical(f"ARM ARCHITECTURE DETECTED AND NO COMPATIBLE DRIVER FOUND. ({e})")
+            logging.critical("webdriver-manager cannot automatically download a driver for this system.")
+            logging.critical("See the 'Troubleshooting' section in README.md for manual solutions.")
+            sys.exit(1)
+
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        user_data_dir = profile_dir
+        logging.info(f"Using persistent user data directory: {user_data_dir}")
+    else:
+        user_data_dir = tempfile.mkdtemp()
+        logging.info(f"Using temporary user data directory: {user_data_dir}")
+
+    driver = None
+    browser_processes = []
+    failed = False
+    try:
+        service = Service(get_chromedriver_path())
+        try:
+            driver = webdriver.Chrome(service=service, options=build_chrome_options(config, headless, user_agent, user_data_dir))
+        except WebDriverException as e:
+            if not profile_dir:
+                raise
+            persistent_dir = profile_dir
+            in_use = is_profile_in_use(persistent_dir, e)
+            if in_use:
+                logging.warning(f"The persistent profile '{persistent_dir}' is in use by another Chrome. Leaving it alone and using a temporary profile.")
+            else:
+                logging.warning(f"Chrome failed to start with the persistent profile: {type(e).__name__}. Trying a temporary profile to see whether the profile is the cause.")
+            profile_dir = None
+            keep_alive = False
+            user_data_dir = tempfile.mkdtemp()
+            logging.info(f"Using temporary user data directory: {user_data_dir}")
+            # If Chrome can't start with a clean profile either (version mismatch, missing binary), this raises and the profile is kept.
+            driver = webdriver.Chrome(service=Service(get_chromedriver_path()), options=build_chrome_options(config, headless, user_agent, user_data_dir))
+            if not in_use:
+                quarantine_profile(persistent_dir)
+        browser_processes = browser_process_tree(driver)
+        if config.LEAN_MODE:
+            apply_lean_mode(config, driver)
+
+        yield driver
+
+    except BaseException:
+        failed = True
+        raise
+
+    finally:
+        # A browser recycled for using too much memory must not be handed out again as a warm session.
+        if driver and keep_alive and not failed and not getattr(driver, 'recycle_requested', False):
+            keep_warm_session(config, profile_dir, driver)
+        else:
+            logging.info("Entering cleanup phase...")
+            if driver:
+                logging.info("Attempting graceful shutdown with driver.quit().")
+                quit_driver(driver, browser_processes)
+
+            if profile_dir:
+                logging.info(f"Keeping persistent user data directory: {profile_dir}")
+            else:
+                logging.info(f"Cleaning up temporary user data directory: {user_data_dir}")
+                try:
+                    shutil.rmtree(user_data_dir, ignore_errors=True)
+                    logging.info(f"Successfully initiated cleanup for temp directory: {user_data_dir}")
+                except Exception as e:
+                    logging.error(f"CRITICAL: Failed to remove temp directory {user_data_dir}. This may cause issues on next run. Error: {e}")
@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+from .config import CONFIG_FILE, ConfigError, load_config, log_config_summary, get_accounts
+
+
+# Modules that only a browser or HTTP run needs. None of them may be imported by `import tiktok_streak_bot` or the CLI itself.
+HEAVY_MODULES = ('selenium', 'webdriver_manager', 'urllib3', 'psutil', 'sqlite3', 'cProfile')
+IMPORT_BUDGET_MS = 75
+PIPELINE_BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "run_benchmark.py")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="tiktok_streak_bot", description="Keep TikTok streaks alive by sending a daily message.")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"path to the configuration file (default: {CONFIG_FILE})")
+    parser.add_argument("--profile", action="store_true", help="profile the next run with cProfile")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    run = commands.add_parser("run", help="send the messages once, right now")
+    run.add_argument("--account", action="append", metavar="NAME", help="only run this account (repeatable)")
+    run.add_argument("--profile", action="store_true", default=argparse.SUPPRESS, help="profile this run with cProfile")
+
+    schedule = commands.add_parser("schedule", help="run at the configured send times (the default without TEST_MODE)")
+    schedule.add_argument("--profile", action="store_true", default=argparse.SUPPRESS, help="profile the first scheduled run with cProfile")
+
+    commands.add_parser("daemon", help="run on schedule and listen on the local control API")
+
+    report = commands.add_parser("report", help="print the run journal")
+    report.add_argument("user", nargs="?", help="only show this target user")
+    report.add_argument("--days", type=int, default=14, help="how many days back to show (default: 14)")
+
+    commands.add_parser("check-cookies", help="check every account's cookies file without starting a browser")
+
+    commands.add_parser("plan", help="predict each scheduled run from past timings and check it against SEND_DEADLINE_HM")
+
+    benchmark = commands.add_parser("benchmark", help="run a benchmark: import time (default) or the offline send pipeline")
+    benchmarks = benchmark.add_subparsers(dest="benchmark", metavar="benchmark")
+    import_benchmark = benchmarks.add_parser("import", help="measure the cold-start import time of the package and the CLI")
+    for parser_ in (benchmark, import_benchmark):
+        parser_.add_argument("--runs", type=int, default=10, help="fresh interpreters per measurement (default: 10)")
+        parser_.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                             help=f"fail if importing the package costs more than this on top of a bare interpreter (default: {IMPORT_BUDGET_MS})")
+    # Every option after `pipeline`, --help included, goes to benchmarks/run_benchmark.py.
+    benchmarks.add_parser("pipeline", add_help=False, help="run the real pipeline against the local fake TikTok (options: benchmark pipeline --help)")
+    return parser
+
+def start_bot_logging(config):
+    from .logs import configure_logging
+
+    configure_logging(config)
+    logging.info("--- Bot Started ---")
+    log_config_summary(config)
+
+def command_run(config, args):
+    from .runner import run_all_accounts
+
+    accounts = get_accounts(config)
+    if args.account:
+        unknown = sorted(set(args.account) - {account['NAME'] for account in accounts})
+        if unknown:
+            logging.error(f"Unknown account(s): {', '.join(unknown)}")
+            return 2
+        accounts = [account for account in accounts if account['NAME'] in args.account]
+    if config.TEST_MODE:
+        logging.info("Test mode enabled. Running bot immediately.")
+    summaries = run_all_accounts(config, accounts)
+    if config.TEST_MODE:
+        logging.info("Test mode run finished.")
+    return 0 if all(not item['failed'] for item in summaries) else 1
+
+def command_schedule(config, args):
+    from .scheduler import run_scheduler
+
+    run_scheduler(config)
+    return 0
+
+def command_daemon(config, args):
+    from .daemon import run_daemon
+
+    run_daemon(config)
+    return 0
+
+def command_report(config, args):
+    from .journal import print_journal_report
+
+    print_journal_report(config, days=args.days, user_filter=args.user)
+    return 0
+
+def command_check_cookies(config, args):
+    from .cookies import check_cookie_file
+
+    accounts = get_accounts(config)
+    failures = 0
+    for account in accounts:
+        report = check_cookie_file(config, account['COOKIES_FILE'])
+        if report['ok']:
+            expires = report['sessionid_expires']
+            until = f"until {datetime.fromtimestamp(expires).strftime('%Y-%m-%d %H:%M')}" if expires else "for this browser session only"
+            print(f"{account['NAME']}: OK - '{report['file']}', {report['cookies']} cookies, sessionid valid {until}"
+                  + (f", {report['expired']} expired" if report['expired'] else "")
+                  + (f", {report['invalid']} invalid" if report['invalid'] else ""))
+        else:
+            failures += 1
+            print(f"{account['NAME']}: FAILED - '{report['file']}': {report['problem']}")
+    return 1 if failures else 0
+
+def command_plan(config, args):
+    from .planner import PLANNER_PERCENTILE, plan_run
+    from .scheduler import utc_now, load_scheduler_state, build_schedule_jobs
+
+    def local(moment):
+        return moment.astimezone().strftime('%Y-%m-%d %H:%M')
+
+    now = utc_now()
+    late = 0
+    for job in build_schedule_jobs(get_accounts(config), load_scheduler_state(config), now):
+        account = job['account']
+        if account['DEADLINE'] is None:
+            print(f"{job['key']}: next run {local(job['next_slot'])}, no SEND_DEADLINE_HM set")
+            continue
+        plan = plan_run(config, account, account['TARGET_USERS'], job['next_slot'], now)
+        basis = f"{plan['history_runs']} past run(s)" if plan['history_runs'] else "defaults"
+        if plan['slack_seconds'] < 0:
+            late += 1
+            verdict = f"DOES NOT FIT, {-plan['slack_seconds'] / 60:.1f} min over"
+        else:
+            verdict = f"{plan['slack_seconds'] / 60:.1f} min to spare"
+        print(f"{job['key']}: start {local(plan['start_at'])}" + (f" (moved up from {local(plan['slot'])})" if plan['start_at'] < plan['slot'] else "")
+              + f", predicted {plan['predicted_seconds'] / 60:.1f} min (p{PLANNER_PERCENTILE} of {basis}), deadline {local(plan['deadline'])}, {verdict}")
+        print("    order: " + ", ".join(f"{user} ({plan['user_seconds'][user]:.0f}s)" for user in plan['users']))
+    return 1 if late else 0
+
+def time_fresh_imports(code, runs, env):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def command_pipeline_benchmark(options):
+    if not os.path.exists(PIPELINE_BENCHMARK):
+        print(f"The pipeline benchmark is not available here: '{PIPELINE_BENCHMARK}' is missing (it ships with the repository, not the package).")
+        return 2
+    return subprocess.run([sys.executable, PIPELINE_BENCHMARK] + options).returncode
+
+def command_import_benchmark(args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.environ.get('PYTHONPATH')])))
+    runs = max(1, args.runs)
+
+    baseline = time_fresh_imports("pass", runs, env)
+    measurements = [
+        ("import tiktok_streak_bot", time_fresh_imports("import tiktok_streak_bot", runs, env)),
+        ("CLI --help", time_fresh_imports("import sys; sys.argv = ['tiktok_streak_bot', '--help']\n"
+                                          "from tiktok_streak_bot.cli import main\ntry:\n    main()\nexcept SystemExit:\n    pass", runs, env)),
+    ]
+    leak_check = subprocess.run(
+        [sys.executable, "-c", "import sys, json, tiktok_streak_bot, tiktok_streak_bot.cli, tiktok_streak_bot.scheduler\n"
+                               f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"],
+        env=env, check=True, capture_output=True, text=True)
+    leaked = json.loads(leak_check.stdout)
+
+    print(f"Cold start over {runs} fresh interpreter(s), median wall time:")
+    print(f"  {'bare interpreter':<28} {baseline:7.1f} ms")
+    failed = bool(leaked)
+    for label, median_ms in measurements:
+        over = median_ms - baseline
+        print(f"  {label:<28} {median_ms:7.1f} ms  (+{over:.1f} ms)")
+        failed = failed or over > args.budget_ms
+    try:
+        full = time_fresh_imports("import tiktok_streak_bot.runner", runs, env)
+        print(f"  {'full run stack (reference)':<28} {full:7.1f} ms  (+{full - baseline:.1f} ms)")
+    except subprocess.CalledProcessError:
+        print("  full run stack (reference)   not importable here (Selenium or another dependency is missing)")
+    if leaked:
+        print(f"Heavy modules loaded at import time: {', '.join(leaked)}")
+    print(f"Budget: +{args.budget_ms:.0f} ms per measurement. {'FAILED' if failed else 'OK'}")
+    return 1 if failed else 0
+
+COMMANDS = {
+    "run": command_run,
+    "schedule": command_schedule,
+    "daemon": command_daemon,
+    "report": command_report,
+    "check-cookies": command_check_cookies,
+    "plan": command_plan,
+}
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "benchmark" and args.benchmark == "pipeline":
+        return command_pipeline_benchmark(extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.command == "benchmark":
+        return command_import_benchmark(args)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[logging.StreamHandler()])
+    try:
+        config = load_config(args.config)
+    except ConfigError as e:
+        logging.critical(f"Exiting due to configuration file error (loading or creation failed): {e}")
+        return 1
+
+    command = args.command or ("run" if config.TEST_MODE else "schedule")
+    if command in ("run", "schedule", "daemon"):
+        start_bot_logging(config)
+    if command == "run" and not args.command:
+        args.account = None
+    if getattr(args, 'profile', False):
+        from .metrics import request_profile
+        request_profile()
+    return COMMANDS[command](config, args)
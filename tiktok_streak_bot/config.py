@@ -0,0 +1,434 @@
+import os
+import json
+import logging
+from datetime import time as dt_time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from urllib.parse import urljoin
+
+
+CONFIG_FILE = "config.json"
+
+DEFAULT_CONFIG = {
+  "TEST_MODE": False,
+  "TARGET_USERS": ["kullanici1", "kullanici2"],
+  "MESSAGE_TO_SEND": ".",
+  "TARGET_SEND_TIME_HM": [0, 2],
+  "COOKIES_FILE": "cookies.json",
+  "LOG_FILENAME": "tiktok_bot.txt",
+  "USER_AGENT": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+  "TIKTOK_MESSAGES_URL": "https://www.tiktok.com/messages?lang=tr-TR",
+  "HEADLESS_MODE": True,
+  "ACCOUNTS": [],
+  "MAX_PARALLEL_ACCOUNTS": 2,
+  "PERSISTENT_PROFILE_DIR": None,
+  "REUSE_BROWSER": False,
+  "LATENCY_BUDGET_MODE": False,
+  "MIN_HUMAN_JITTER_SECONDS": 0.3,
+  "TIMEZONE": None,
+  "CATCH_UP_POLICY": "once",
+  "CATCH_UP_WINDOW_MINUTES": 720,
+  "SCHEDULER_STATE_FILE": "scheduler_state.json",
+  "JOURNAL_FILE": "run_journal.db",
+  "SEND_DEADLINE_HM": None,
+  "DEADLINE_SAFETY_MARGIN_MINUTES": 10,
+  "PLANNER_HISTORY_RUNS": 14,
+  "RETRY_POLICY": {
+    "MAX_ATTEMPTS": 3,
+    "BASE_DELAY_SECONDS": 2,
+    "MAX_DELAY_SECONDS": 20,
+    "RETRY_ON": ["StaleElementReferenceException", "TimeoutException", "ElementNotInteractableException", "no_conversations"]
+  },
+  "CIRCUIT_BREAKER_THRESHOLD": 3,
+  "METRICS_JSON_DIR": "metrics",
+  "METRICS_TEXTFILE": None,
+  "CDP_COOKIE_INJECTION": True,
+  "COOKIE_CACHE_FILE": ".cookie_cache.json",
+  "CONVERSATION_CACHE_FILE": "conversation_cache.json",
+  "LEAN_MODE": False,
+  "LEAN_BLOCK_PATTERNS": [
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.m4s*", "*/video/tos/*",
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.heic*",
+    "*.woff*", "*.ttf*", "*.otf*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*connect.facebook.net*",
+    "*mon.tiktokv.com*", "*mon-va.byteoversea.com*", "*mcs-va.tiktok.com*", "*/monitor_browser/*", "*/web/report*"
+  ],
+  "LEAN_UNBLOCK_PATTERNS": [],
+  "PAGE_LOAD_STRATEGY": "normal",
+  "NETWORK_REPORT": False,
+  "LOG_LEVEL": "INFO",
+  "LOG_JSON": False,
+  "LOG_MAX_BYTES": 5242880,
+  "LOG_ROTATE_WHEN": "midnight",
+  "LOG_BACKUP_COUNT": 14,
+  "LOG_COMPRESS": True,
+  "SELECTOR_FAIL_FAST_SECONDS": 5,
+  "TAB_CONCURRENCY": 1,
+  "LOW_MEMORY_MODE": False,
+  "MEMORY_CEILING_MB": None,
+  "MEMORY_SAMPLE_SECONDS": 2,
+  "TRANSPORT": "browser",
+  "HTTP_TRANSPORT": {
+    "BASE_URL": None,
+    "SEND_PATH": "/api/im/message/send",
+    "TIMEOUT_SECONDS": 10,
+    "POOL_SIZE": 10
+  },
+  "CONTROL_HOST": "127.0.0.1",
+  "CONTROL_PORT": 8787,
+  "CONTROL_TOKEN": None
+}
+
+MAX_TAB_CONCURRENCY = 8
+# The intervals logging.handlers.TimedRotatingFileHandler understands.
+LOG_ROTATE_INTERVALS = ('S', 'M', 'H', 'D', 'MIDNIGHT', 'W0', 'W1', 'W2', 'W3', 'W4', 'W5', 'W6')
+
+# Settings that only feed the next run. Everything else is wired into logging, the control API or running browsers
+# when the bot starts and needs a restart.
+HOT_RELOAD_KEYS = ('TARGET_USERS', 'MESSAGE_TO_SEND', 'TARGET_SEND_TIME_HM', 'COOKIES_FILE', 'ACCOUNTS', 'TIMEZONE', 'HEADLESS_MODE', 'USER_AGENT',
+                   'SEND_DEADLINE_HM', 'DEADLINE_SAFETY_MARGIN_MINUTES', 'PLANNER_HISTORY_RUNS')
+
+class ConfigError(Exception):
+    pass
+
+def load_or_create_config(filename):
+    if not os.path.exists(filename):
+        logging.warning(f"Configuration file '{filename}' not found. Creating it with default values.")
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(DEFAULT_CONFIG, f, indent=4, ensure_ascii=False)
+            logging.info(f"Default configuration file '{filename}' created successfully.")
+            return DEFAULT_CONFIG
+        except IOError as e:
+            logging.error(f"ERROR: Could not create configuration file '{filename}': {e}")
+            return None
+        except Exception as e:
+            logging.error(f"ERROR: An unexpected error occurred while creating config file '{filename}': {e}")
+            return None
+    else:
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                config_data = json.load(f)
+            logging.info(f"Configuration loaded successfully from existing '{filename}'.")
+            return config_data
+        except json.JSONDecodeError as e:
+            logging.error(f"ERROR: Configuration file '{filename}' contains invalid JSON: {e}")
+            return None
+        except Exception as e:
+            logging.error(f"ERROR: An unexpected error occurred while loading config file '{filename}': {e}")
+            return None
+
+def parse_send_times(value):
+    # Accepts a single [hour, minute] pair or a list of them.
+    if isinstance(value, list) and len(value) == 2 and not isinstance(value[0], list):
+        value = [value]
+    if not isinstance(value, list) or not value:
+        raise ValueError("TARGET_SEND_TIME_HM must be [hour, minute] or a list of [hour, minute] pairs")
+    send_times = []
+    for pair in value:
+        if not isinstance(pair, list) or len(pair) != 2:
+            raise ValueError(f"Invalid [hour, minute] pair: {pair}")
+        send_times.append(dt_time(int(pair[0]), int(pair[1])))
+    return sorted(set(send_times))
+
+def parse_deadline(value):
+    # null turns the deadline planner off.
+    if value is None:
+        return None
+    if not isinstance(value, list) or len(value) != 2:
+        raise ValueError("SEND_DEADLINE_HM must be [hour, minute] or null")
+    return dt_time(int(value[0]), int(value[1]))
+
+def load_timezone(name):
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        logging.error(f"Unknown time zone '{name}': {e}. Using the system local time instead.")
+        return None
+
+class Config:
+    # The validated settings, one attribute per config.json key. Invalid values are logged and replaced by their defaults.
+    def __init__(self, data=None, path=CONFIG_FILE):
+        self.path = path
+        self.raw = dict(data if data is not None else DEFAULT_CONFIG)
+
+        self.TEST_MODE = self.setting('TEST_MODE')
+        self.TARGET_USERS = self.setting('TARGET_USERS')
+        self.MESSAGE_TO_SEND = self.setting('MESSAGE_TO_SEND')
+        self.COOKIES_FILE = self.setting('COOKIES_FILE')
+        self.LOG_FILENAME = self.setting('LOG_FILENAME')
+        self.USER_AGENT = self.setting('USER_AGENT')
+        self.TIKTOK_MESSAGES_URL = self.setting('TIKTOK_MESSAGES_URL')
+        self.TIKTOK_EXPLORE_URL = urljoin(self.TIKTOK_MESSAGES_URL, "/explore")
+        self.HEADLESS_MODE = self.setting('HEADLESS_MODE')
+        self.ACCOUNTS = self.setting('ACCOUNTS') or []
+        self.MAX_PARALLEL_ACCOUNTS = self.setting('MAX_PARALLEL_ACCOUNTS')
+        self.PERSISTENT_PROFILE_DIR = self.setting('PERSISTENT_PROFILE_DIR')
+        self.REUSE_BROWSER = self.setting('REUSE_BROWSER')
+        self.LATENCY_BUDGET_MODE = self.setting('LATENCY_BUDGET_MODE')
+        self.MIN_HUMAN_JITTER_SECONDS = self.setting('MIN_HUMAN_JITTER_SECONDS')
+        self.TIMEZONE = load_timezone(self.setting('TIMEZONE'))
+        self.CATCH_UP_POLICY = self.setting('CATCH_UP_POLICY')
+        self.CATCH_UP_WINDOW_MINUTES = self.setting('CATCH_UP_WINDOW_MINUTES')
+        self.SCHEDULER_STATE_FILE = self.setting('SCHEDULER_STATE_FILE')
+        self.JOURNAL_FILE = self.setting('JOURNAL_FILE')
+        self.DEADLINE_SAFETY_MARGIN_MINUTES = self.setting('DEADLINE_SAFETY_MARGIN_MINUTES')
+        self.PLANNER_HISTORY_RUNS = self.setting('PLANNER_HISTORY_RUNS')
+        self.RETRY_POLICY = dict(DEFAULT_CONFIG['RETRY_POLICY'], **(self.raw.get('RETRY_POLICY') or {}))
+        self.CIRCUIT_BREAKER_THRESHOLD = self.setting('CIRCUIT_BREAKER_THRESHOLD')
+        self.METRICS_JSON_DIR = self.setting('METRICS_JSON_DIR')
+        self.METRICS_TEXTFILE = self.setting('METRICS_TEXTFILE')
+        self.CDP_COOKIE_INJECTION = self.setting('CDP_COOKIE_INJECTION')
+        self.COOKIE_CACHE_FILE = self.setting('COOKIE_CACHE_FILE')
+        self.CONVERSATION_CACHE_FILE = self.setting('CONVERSATION_CACHE_FILE')
+        self.LEAN_MODE = self.setting('LEAN_MODE')
+        self.LEAN_BLOCK_PATTERNS = self.setting('LEAN_BLOCK_PATTERNS')
+        self.LEAN_UNBLOCK_PATTERNS = self.setting('LEAN_UNBLOCK_PATTERNS')
+        self.PAGE_LOAD_STRATEGY = self.setting('PAGE_LOAD_STRATEGY')
+        self.NETWORK_REPORT = self.setting('NETWORK_REPORT') or self.LEAN_MODE
+        self.LOG_LEVEL = str(self.setting('LOG_LEVEL')).upper()
+        self.LOG_JSON = self.setting('LOG_JSON')
+        self.LOG_MAX_BYTES = self.setting('LOG_MAX_BYTES') or 0
+        self.LOG_ROTATE_WHEN = self.setting('LOG_ROTATE_WHEN')
+        self.LOG_BACKUP_COUNT = self.setting('LOG_BACKUP_COUNT') or 0
+        self.LOG_COMPRESS = self.setting('LOG_COMPRESS')
+        self.SELECTOR_FAIL_FAST_SECONDS = self.setting('SELECTOR_FAIL_FAST_SECONDS')
+        self.TAB_CONCURRENCY = self.setting('TAB_CONCURRENCY')
+        self.LOW_MEMORY_MODE = self.setting('LOW_MEMORY_MODE')
+        self.MEMORY_CEILING_MB = self.setting('MEMORY_CEILING_MB')
+        self.MEMORY_SAMPLE_SECONDS = self.setting('MEMORY_SAMPLE_SECONDS')
+        self.TRANSPORT = self.setting('TRANSPORT')
+        self.HTTP_TRANSPORT = dict(DEFAULT_CONFIG['HTTP_TRANSPORT'], **(self.raw.get('HTTP_TRANSPORT') or {}))
+        self.CONTROL_HOST = self.setting('CONTROL_HOST')
+        self.CONTROL_PORT = self.setting('CONTROL_PORT')
+        self.CONTROL_TOKEN = self.setting('CONTROL_TOKEN')
+        self.validate()
+
+    def setting(self, key):
+        return self.raw.get(key, DEFAULT_CONFIG[key])
+
+    def validate(self):
+        time_hm = self.setting('TARGET_SEND_TIME_HM')
+        try:
+            self.TARGET_SEND_TIMES = parse_send_times(time_hm)
+        except (ValueError, TypeError) as e:
+            logging.error(f"Invalid TARGET_SEND_TIME_HM format in config: {time_hm}. Error: {e}. Using default {DEFAULT_CONFIG['TARGET_SEND_TIME_HM']}.")
+            self.TARGET_SEND_TIMES = parse_send_times(DEFAULT_CONFIG['TARGET_SEND_TIME_HM'])
+        self.TARGET_SEND_TIME = self.TARGET_SEND_TIMES[0]
+
+        if self.CATCH_UP_POLICY not in ("once", "skip"):
+            logging.error(f"Invalid CATCH_UP_POLICY value in config: {self.CATCH_UP_POLICY}. Using default '{DEFAULT_CONFIG['CATCH_UP_POLICY']}'.")
+            self.CATCH_UP_POLICY = DEFAULT_CONFIG['CATCH_UP_POLICY']
+        try:
+            self.CATCH_UP_WINDOW_MINUTES = max(0, int(self.CATCH_UP_WINDOW_MINUTES))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid CATCH_UP_WINDOW_MINUTES value in config: {self.CATCH_UP_WINDOW_MINUTES}. Using default {DEFAULT_CONFIG['CATCH_UP_WINDOW_MINUTES']}.")
+            self.CATCH_UP_WINDOW_MINUTES = DEFAULT_CONFIG['CATCH_UP_WINDOW_MINUTES']
+
+        deadline_hm = self.setting('SEND_DEADLINE_HM')
+        try:
+            self.SEND_DEADLINE = parse_deadline(deadline_hm)
+        except (ValueError, TypeError) as e:
+            logging.error(f"Invalid SEND_DEADLINE_HM format in config: {deadline_hm}. Error: {e}. The deadline planner is disabled.")
+            self.SEND_DEADLINE = None
+        try:
+            self.DEADLINE_SAFETY_MARGIN_MINUTES = max(0.0, float(self.DEADLINE_SAFETY_MARGIN_MINUTES))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid DEADLINE_SAFETY_MARGIN_MINUTES value in config: {self.DEADLINE_SAFETY_MARGIN_MINUTES}. Using default {DEFAULT_CONFIG['DEADLINE_SAFETY_MARGIN_MINUTES']}.")
+            self.DEADLINE_SAFETY_MARGIN_MINUTES = DEFAULT_CONFIG['DEADLINE_SAFETY_MARGIN_MINUTES']
+        try:
+            self.PLANNER_HISTORY_RUNS = max(1, int(self.PLANNER_HISTORY_RUNS))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid PLANNER_HISTORY_RUNS value in config: {self.PLANNER_HISTORY_RUNS}. Using default {DEFAULT_CONFIG['PLANNER_HISTORY_RUNS']}.")
+            self.PLANNER_HISTORY_RUNS = DEFAULT_CONFIG['PLANNER_HISTORY_RUNS']
+
+        if not self.TARGET_USERS and not self.ACCOUNTS:
+            logging.warning("Warning: TARGET_USERS list is empty in the configuration. The bot will run but won't send messages.")
+
+        try:
+            self.MAX_PARALLEL_ACCOUNTS = max(1, int(self.MAX_PARALLEL_ACCOUNTS))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid MAX_PARALLEL_ACCOUNTS value in config: {self.MAX_PARALLEL_ACCOUNTS}. Using default {DEFAULT_CONFIG['MAX_PARALLEL_ACCOUNTS']}.")
+            self.MAX_PARALLEL_ACCOUNTS = DEFAULT_CONFIG['MAX_PARALLEL_ACCOUNTS']
+
+        if self.ACCOUNTS:
+            self.LOG_FORMAT = '%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s'
+        else:
+            self.LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+        if self.LOG_LEVEL not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+            logging.error(f"Invalid LOG_LEVEL value in config: {self.LOG_LEVEL}. Using default '{DEFAULT_CONFIG['LOG_LEVEL']}'.")
+            self.LOG_LEVEL = DEFAULT_CONFIG['LOG_LEVEL']
+        if self.LOG_ROTATE_WHEN and str(self.LOG_ROTATE_WHEN).upper() not in LOG_ROTATE_INTERVALS:
+            logging.error(f"Invalid LOG_ROTATE_WHEN value in config: {self.LOG_ROTATE_WHEN}. Using default '{DEFAULT_CONFIG['LOG_ROTATE_WHEN']}'.")
+            self.LOG_ROTATE_WHEN = DEFAULT_CONFIG['LOG_ROTATE_WHEN']
+        try:
+            self.LOG_MAX_BYTES = max(0, int(self.LOG_MAX_BYTES))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid LOG_MAX_BYTES value in config: {self.LOG_MAX_BYTES}. Using default {DEFAULT_CONFIG['LOG_MAX_BYTES']}.")
+            self.LOG_MAX_BYTES = DEFAULT_CONFIG['LOG_MAX_BYTES']
+        try:
+            self.LOG_BACKUP_COUNT = max(0, int(self.LOG_BACKUP_COUNT))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid LOG_BACKUP_COUNT value in config: {self.LOG_BACKUP_COUNT}. Using default {DEFAULT_CONFIG['LOG_BACKUP_COUNT']}.")
+            self.LOG_BACKUP_COUNT = DEFAULT_CONFIG['LOG_BACKUP_COUNT']
+
+        try:
+            self.MIN_HUMAN_JITTER_SECONDS = max(0.0, float(self.MIN_HUMAN_JITTER_SECONDS))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid MIN_HUMAN_JITTER_SECONDS value in config: {self.MIN_HUMAN_JITTER_SECONDS}. Using default {DEFAULT_CONFIG['MIN_HUMAN_JITTER_SECONDS']}.")
+            self.MIN_HUMAN_JITTER_SECONDS = DEFAULT_CONFIG['MIN_HUMAN_JITTER_SECONDS']
+
+        try:
+            self.RETRY_POLICY['MAX_ATTEMPTS'] = max(1, int(self.RETRY_POLICY['MAX_ATTEMPTS']))
+            self.RETRY_POLICY['BASE_DELAY_SECONDS'] = max(0.0, float(self.RETRY_POLICY['BASE_DELAY_SECONDS']))
+            self.RETRY_POLICY['MAX_DELAY_SECONDS'] = max(0.0, float(self.RETRY_POLICY['MAX_DELAY_SECONDS']))
+            self.RETRY_POLICY['RETRY_ON'] = list(self.RETRY_POLICY['RETRY_ON'])
+        except (ValueError, TypeError) as e:
+            logging.error(f"Invalid RETRY_POLICY in config: {e}. Using default {DEFAULT_CONFIG['RETRY_POLICY']}.")
+            self.RETRY_POLICY = dict(DEFAULT_CONFIG['RETRY_POLICY'])
+        try:
+            self.CIRCUIT_BREAKER_THRESHOLD = max(0, int(self.CIRCUIT_BREAKER_THRESHOLD))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid CIRCUIT_BREAKER_THRESHOLD value in config: {self.CIRCUIT_BREAKER_THRESHOLD}. Using default {DEFAULT_CONFIG['CIRCUIT_BREAKER_THRESHOLD']}.")
+            self.CIRCUIT_BREAKER_THRESHOLD = DEFAULT_CONFIG['CIRCUIT_BREAKER_THRESHOLD']
+
+        try:
+            self.SELECTOR_FAIL_FAST_SECONDS = max(0.0, float(self.SELECTOR_FAIL_FAST_SECONDS))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid SELECTOR_FAIL_FAST_SECONDS value in config: {self.SELECTOR_FAIL_FAST_SECONDS}. Using default {DEFAULT_CONFIG['SELECTOR_FAIL_FAST_SECONDS']}.")
+            self.SELECTOR_FAIL_FAST_SECONDS = DEFAULT_CONFIG['SELECTOR_FAIL_FAST_SECONDS']
+
+        try:
+            self.TAB_CONCURRENCY = min(MAX_TAB_CONCURRENCY, max(1, int(self.TAB_CONCURRENCY)))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid TAB_CONCURRENCY value in config: {self.TAB_CONCURRENCY}. Using default {DEFAULT_CONFIG['TAB_CONCURRENCY']}.")
+            self.TAB_CONCURRENCY = DEFAULT_CONFIG['TAB_CONCURRENCY']
+        try:
+            self.MEMORY_CEILING_MB = max(0.0, float(self.MEMORY_CEILING_MB)) if self.MEMORY_CEILING_MB else None
+        except (ValueError, TypeError):
+            logging.error(f"Invalid MEMORY_CEILING_MB value in config: {self.MEMORY_CEILING_MB}. Using default {DEFAULT_CONFIG['MEMORY_CEILING_MB']}.")
+            self.MEMORY_CEILING_MB = DEFAULT_CONFIG['MEMORY_CEILING_MB']
+        try:
+            self.MEMORY_SAMPLE_SECONDS = max(0.0, float(self.MEMORY_SAMPLE_SECONDS))
+        except (ValueError, TypeError):
+            logging.error(f"Invalid MEMORY_SAMPLE_SECONDS value in config: {self.MEMORY_SAMPLE_SECONDS}. Using default {DEFAULT_CONFIG['MEMORY_SAMPLE_SECONDS']}.")
+            self.MEMORY_SAMPLE_SECONDS = DEFAULT_CONFIG['MEMORY_SAMPLE_SECONDS']
+
+        if self.TRANSPORT not in ("browser", "http"):
+            logging.error(f"Invalid TRANSPORT value in config: {self.TRANSPORT}. Using default '{DEFAULT_CONFIG['TRANSPORT']}'.")
+            self.TRANSPORT = DEFAULT_CONFIG['TRANSPORT']
+        try:
+            self.HTTP_TRANSPORT['TIMEOUT_SECONDS'] = max(1.0, float(self.HTTP_TRANSPORT['TIMEOUT_SECONDS']))
+            self.HTTP_TRANSPORT['POOL_SIZE'] = max(1, int(self.HTTP_TRANSPORT['POOL_SIZE']))
+        except (ValueError, TypeError) as e:
+            logging.error(f"Invalid HTTP_TRANSPORT in config: {e}. Using default {DEFAULT_CONFIG['HTTP_TRANSPORT']}.")
+            self.HTTP_TRANSPORT = dict(DEFAULT_CONFIG['HTTP_TRANSPORT'])
+        if self.TRANSPORT == "http" and not self.HTTP_TRANSPORT['BASE_URL']:
+            logging.error("TRANSPORT is 'http' but HTTP_TRANSPORT.BASE_URL is not set. Every run will use the browser.")
+
+        if self.PAGE_LOAD_STRATEGY not in ("normal", "eager"):
+            logging.error(f"Invalid PAGE_LOAD_STRATEGY value in config: {self.PAGE_LOAD_STRATEGY}. Using default '{DEFAULT_CONFIG['PAGE_LOAD_STRATEGY']}'.")
+            self.PAGE_LOAD_STRATEGY = DEFAULT_CONFIG['PAGE_LOAD_STRATEGY']
+
+def load_config(path=CONFIG_FILE):
+    data = load_or_create_config(path)
+    if data is None:
+        raise ConfigError(f"Could not load or create the configuration file '{path}'.")
+    return Config(data, path)
+
+def reload_config(config):
+    new_data = load_or_create_config(config.path)
+    if new_data is None:
+        raise ValueError(f"Could not load '{config.path}'. Keeping the current configuration.")
+    parse_send_times(new_data.get('TARGET_SEND_TIME_HM', DEFAULT_CONFIG['TARGET_SEND_TIME_HM']))
+
+    def value(data, key):
+        return data.get(key, DEFAULT_CONFIG.get(key))
+
+    changed = [key for key in HOT_RELOAD_KEYS if value(new_data, key) != value(config.raw, key)]
+    needs_restart = sorted(key for key in set(new_data) | set(config.raw)
+                           if key not in HOT_RELOAD_KEYS and value(new_data, key) != value(config.raw, key))
+
+    merged = dict(config.raw)
+    for key in HOT_RELOAD_KEYS:
+        if key in new_data:
+            merged[key] = new_data[key]
+        else:
+            merged.pop(key, None)
+    new_config = Config(merged, config.path)
+
+    logging.info(f"Configuration reloaded. Changed: {', '.join(changed) or 'nothing'}.")
+    if needs_restart:
+        logging.warning(f"These settings changed but only take effect after a restart: {', '.join(needs_restart)}")
+    return new_config, {"changed": changed, "needs_restart": needs_restart}
+
+def log_config_summary(config):
+    logging.info(f"Using configuration from '{config.path}'. TEST_MODE: {config.TEST_MODE}, Target Time: {', '.join(t.strftime('%H:%M') for t in config.TARGET_SEND_TIMES)}")
+    if config.LEAN_MODE:
+        logging.info(f"Lean mode: blocking media, images, fonts and trackers ({len(config.LEAN_BLOCK_PATTERNS)} patterns, {len(config.LEAN_UNBLOCK_PATTERNS)} unblock rule(s)). Page load strategy: {config.PAGE_LOAD_STRATEGY}")
+    if config.TAB_CONCURRENCY > 1:
+        logging.info(f"Multi-tab mode: up to {config.TAB_CONCURRENCY} conversations open at once per browser.")
+    if config.LOW_MEMORY_MODE:
+        logging.info(f"Low-memory mode: limiting renderer processes and disabling background features. Memory ceiling: {f'{config.MEMORY_CEILING_MB:.0f} MB' if config.MEMORY_CEILING_MB else 'none'}")
+    if config.LATENCY_BUDGET_MODE:
+        logging.info(f"Latency budget mode: waiting on DOM readiness instead of fixed sleeps (human jitter {config.MIN_HUMAN_JITTER_SECONDS:.2f}-{config.MIN_HUMAN_JITTER_SECONDS * 2:.2f}s).")
+    if config.PERSISTENT_PROFILE_DIR:
+        logging.info(f"Persistent session mode: profiles kept under '{config.PERSISTENT_PROFILE_DIR}'. Warm browser reuse: {config.REUSE_BROWSER}")
+    elif config.REUSE_BROWSER:
+        logging.warning("REUSE_BROWSER needs PERSISTENT_PROFILE_DIR to be set. Ignoring it.")
+    if config.SEND_DEADLINE:
+        logging.info(f"Deadline planner: all sends should finish by {config.SEND_DEADLINE.strftime('%H:%M')} with a {config.DEADLINE_SAFETY_MARGIN_MINUTES:.0f} minute safety margin.")
+    if config.ACCOUNTS:
+        logging.info(f"Multi-account mode: {len(config.ACCOUNTS)} accounts configured, up to {config.MAX_PARALLEL_ACCOUNTS} running in parallel.")
+
+def get_accounts(config):
+    if not config.ACCOUNTS:
+        return [{
+            "NAME": "default",
+            "COOKIES_FILE": config.COOKIES_FILE,
+            "TARGET_USERS": config.TARGET_USERS,
+            "MESSAGE_TO_SEND": config.MESSAGE_TO_SEND,
+            "SEND_TIMES": config.TARGET_SEND_TIMES,
+            "TIMEZONE": config.TIMEZONE,
+            "DEADLINE": config.SEND_DEADLINE,
+        }]
+
+    accounts = []
+    seen_names = set()
+    for i, account in enumerate(config.ACCOUNTS):
+        if not isinstance(account, dict):
+            logging.error(f"Account entry #{i+1} in ACCOUNTS is not an object. Skipping it.")
+            continue
+        name = account.get('NAME') or f"account{i+1}"
+        # The name keys the profile folder, the journal, the caches and the scheduler state. Case-insensitive file systems fold it.
+        if str(name).casefold() in seen_names:
+            logging.error(f"Account entry #{i+1} uses the name '{name}', which another account already has. Skipping it.")
+            continue
+        seen_names.add(str(name).casefold())
+        if 'COOKIES_FILE' not in account:
+            logging.error(f"Account '{name}' has no COOKIES_FILE. Skipping it.")
+            continue
+        send_times = config.TARGET_SEND_TIMES
+        if 'TARGET_SEND_TIME_HM' in account:
+            try:
+                send_times = parse_send_times(account['TARGET_SEND_TIME_HM'])
+            except (ValueError, TypeError) as e:
+                logging.error(f"Invalid TARGET_SEND_TIME_HM for account '{name}': {e}. Using the global send times.")
+        deadline = config.SEND_DEADLINE
+        if 'SEND_DEADLINE_HM' in account:
+            try:
+                deadline = parse_deadline(account['SEND_DEADLINE_HM'])
+            except (ValueError, TypeError) as e:
+                logging.error(f"Invalid SEND_DEADLINE_HM for account '{name}': {e}. Using the global deadline.")
+        accounts.append({
+            "NAME": name,
+            "COOKIES_FILE": account['COOKIES_FILE'],
+            "TARGET_USERS": account.get('TARGET_USERS', []),
+            "MESSAGE_TO_SEND": account.get('MESSAGE_TO_SEND', config.MESSAGE_TO_SEND),
+            "SEND_TIMES": send_times,
+            "TIMEZONE": load_timezone(account['TIMEZONE']) if account.get('TIMEZONE') else config.TIMEZONE,
+            "DEADLINE": deadline,
+        })
+    return accounts
@@ -0,0 +1,138 @@
+import os
+import time
+import json
+import hashlib
+import logging
+import threading
+
+
+COOKIE_CACHE_VERSION = 1
+_cookie_cache_lock = threading.Lock()
+
+def write_cookie_cache(cache_file, cache):
+    # The cache holds the session cookies: owner-only, and never seen half-written.
+    temp_path = f"{cache_file}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.chmod(temp_path, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(temp_path, cache_file)
+
+def normalize_cookie(cookie, i):
+    cookie_to_add = {}
+    cookie_to_add['name'] = cookie['name']
+    cookie_to_add['value'] = cookie['value']
+    if 'path' in cookie: cookie_to_add['path'] = cookie['path']
+    if 'domain' in cookie: cookie_to_add['domain'] = cookie['domain']
+    if 'secure' in cookie: cookie_to_add['secure'] = cookie['secure']
+    if 'httpOnly' in cookie: cookie_to_add['httpOnly'] = cookie['httpOnly']
+
+    if 'expirationDate' in cookie and cookie['expirationDate']:
+        try:
+            expiry_timestamp = int(float(cookie['expirationDate']))
+            cookie_to_add['expiry'] = expiry_timestamp
+        except (ValueError, TypeError):
+            logging.debug("C#%d ('%s') invalid expirationDate. Skipping expiry.", i + 1, cookie.get('name'))
+
+    if 'sameSite' in cookie:
+        samesite_value = cookie['sameSite']
+        if samesite_value is None or isinstance(samesite_value, str) and samesite_value.lower() == 'no_restriction':
+             if cookie_to_add.get('secure'):
+                 cookie_to_add['sameSite'] = 'None'
+             else:
+                 logging.debug("C#%d ('%s') SameSite=None/null but not secure. Skipping SS.", i + 1, cookie.get('name'))
+        elif isinstance(samesite_value, str) and samesite_value.lower() in ['lax', 'strict', 'none']:
+             cookie_to_add['sameSite'] = samesite_value.capitalize()
+        else:
+             logging.debug("C#%d ('%s') unknown sameSite value. Skipping SS.", i + 1, cookie.get('name'))
+
+    if 'domain' not in cookie_to_add or not cookie_to_add['domain']:
+         cookie_to_add['domain'] = ".tiktok.com"
+    return cookie_to_add
+
+def read_cookie_cache(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') == COOKIE_CACHE_VERSION:
+            return cache
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.debug("Ignoring unreadable cookie cache '%s': %s", cache_file, e)
+    return {"version": COOKIE_CACHE_VERSION, "jars": {}}
+
+def load_normalized_cookies(config, cookie_file):
+    with open(cookie_file, 'rb') as f:
+        raw = f.read()
+    key = os.path.abspath(cookie_file)
+    mtime = os.path.getmtime(cookie_file)
+    digest = hashlib.sha256(raw).hexdigest()
+
+    with _cookie_cache_lock:
+        cache = read_cookie_cache(config.COOKIE_CACHE_FILE) if config.COOKIE_CACHE_FILE else None
+        entry = cache['jars'].get(key) if cache else None
+        if entry and entry['mtime'] == mtime and entry['sha256'] == digest:
+            logging.info(f"Using cached normalized cookie jar for '{cookie_file}' ({len(entry['cookies'])} cookies).")
+            return entry['cookies'], entry['invalid']
+
+        cookies = json.loads(raw.decode('utf-8'))
+        logging.info(f"Read {len(cookies)} cookies from file.")
+        normalized = []
+        invalid = 0
+        for i, cookie in enumerate(cookies):
+            try:
+                normalized.append(normalize_cookie(cookie, i))
+            except (KeyError, TypeError) as e:
+                invalid += 1
+                logging.warning(f"Cookie C#{i+1} is missing required fields ({type(e).__name__}). Skipping it.")
+
+        if cache is not None:
+            cache['jars'][key] = {"mtime": mtime, "sha256": digest, "cookies": normalized, "invalid": invalid}
+            try:
+                write_cookie_cache(config.COOKIE_CACHE_FILE, cache)
+            except IOError as e:
+                logging.warning(f"Could not write cookie cache '{config.COOKIE_CACHE_FILE}': {e}")
+        return normalized, invalid
+
+def drop_expired_cookies(cookies):
+    now = time.time()
+    live = [cookie for cookie in cookies if 'expiry' not in cookie or cookie['expiry'] > now]
+    expired = [cookie['name'] for cookie in cookies if 'expiry' in cookie and cookie['expiry'] <= now]
+    if expired:
+        logging.warning(f"{len(expired)} cookies have already expired and will not be loaded: {', '.join(expired)}")
+        if 'sessionid' in expired:
+            logging.error("The 'sessionid' cookie has expired. Export fresh cookies or the bot will not be logged in.")
+    return live
+
+def cookie_header(cookies, host):
+    def matches(domain):
+        domain = (domain or '').lstrip('.').lower()
+        return not domain or host == domain or host.endswith('.' + domain)
+    return "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies if matches(cookie.get('domain')))
+
+def check_cookie_file(config, cookie_file):
+    # Offline check of one account's cookie export; nothing here starts a browser or talks to TikTok.
+    report = {"file": cookie_file, "ok": False, "cookies": 0, "invalid": 0, "expired": 0, "sessionid_expires": None, "problem": None}
+    try:
+        cookies, report['invalid'] = load_normalized_cookies(config, cookie_file)
+    except FileNotFoundError:
+        report['problem'] = "file not found"
+        return report
+    except (ValueError, UnicodeDecodeError):
+        report['problem'] = "not valid JSON"
+        return report
+    except OSError as e:
+        report['problem'] = str(e)
+        return report
+
+    live = drop_expired_cookies(cookies)
+    report['cookies'] = len(live)
+    report['expired'] = len(cookies) - len(live)
+    session = next((cookie for cookie in live if cookie['name'] == 'sessionid'), None)
+    if session is None:
+        report['problem'] = "no valid 'sessionid' cookie"
+        return report
+    report['sessionid_expires'] = session.get('expiry')
+    report['ok'] = True
+    return report
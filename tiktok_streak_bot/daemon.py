@@ -0,0 +1,219 @@
+import json
+import logging
+import threading
+from datetime import timedelta
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from .config import get_accounts, reload_config
+from .scheduler import SCHEDULER_MAX_SLEEP_SECONDS, utc_now, load_scheduler_state, save_scheduler_state, build_schedule_jobs, job_start, sleep_until, collect_due_accounts
+from .planner import plan_jobs
+# Imported up front on purpose: a triggered run should not pay for loading Selenium.
+from .runner import run_all_accounts
+
+
+_daemon_lock = threading.Lock()
+_daemon_wake = threading.Event()
+_daemon_state = {
+    "status": "idle",
+    "started_at": None,
+    "config_loaded_at": None,
+    "current_run": None,
+    "last_run": None,
+    "next_run": None,
+    "plans": [],
+    "pending_trigger": None,
+    "pending_reload": False,
+    "last_reload": None,
+    "runs": 0,
+}
+
+def daemon_status():
+    with _daemon_lock:
+        return json.loads(json.dumps(_daemon_state, default=str))
+
+def request_trigger(account_names=None):
+    with _daemon_lock:
+        pending = _daemon_state['pending_trigger']
+        if account_names is None or (pending is not None and "*" in pending):
+            merged = ["*"]
+        else:
+            merged = sorted(set(pending or []) | set(account_names))
+        _daemon_state['pending_trigger'] = merged
+        response = {"queued": True, "coalesced": pending is not None, "after_current_run": _daemon_state['status'] == "running", "accounts": merged}
+    _daemon_wake.set()
+    return response
+
+def request_reload():
+    with _daemon_lock:
+        _daemon_state['pending_reload'] = True
+        response = {"queued": True, "after_current_run": _daemon_state['status'] == "running"}
+    _daemon_wake.set()
+    return response
+
+def take_triggered_accounts(config):
+    with _daemon_lock:
+        names = _daemon_state['pending_trigger']
+        _daemon_state['pending_trigger'] = None
+    if names is None:
+        return []
+    accounts = get_accounts(config)
+    if "*" in names:
+        return accounts
+    return [account for account in accounts if account['NAME'] in names]
+
+def apply_pending_reload(config, jobs):
+    with _daemon_lock:
+        if not _daemon_state['pending_reload']:
+            return config, jobs
+        _daemon_state['pending_reload'] = False
+    try:
+        config, result = reload_config(config)
+    except (ValueError, TypeError) as e:
+        logging.error(f"Config reload failed: {e}")
+        result = {"error": str(e)}
+    else:
+        # Keep the progress of schedules that still exist so a reload doesn't re-run today's slots.
+        state = load_scheduler_state(config)
+        state.update({job['key']: job['last_slot'] for job in jobs if job['last_slot']})
+        jobs = build_schedule_jobs(get_accounts(config), state, utc_now())
+    with _daemon_lock:
+        _daemon_state['last_reload'] = dict(result, at=utc_now().isoformat())
+        if 'error' not in result:
+            _daemon_state['config_loaded_at'] = utc_now().isoformat()
+    return config, jobs
+
+def run_daemon_batch(config, accounts, reason):
+    with _daemon_lock:
+        _daemon_state['status'] = "running"
+        _daemon_state['current_run'] = {"reason": reason, "accounts": [a['NAME'] for a in accounts], "started_at": utc_now().isoformat()}
+    summaries = []
+    error = None
+    try:
+        summaries = run_all_accounts(config, accounts)
+    except Exception as e:
+        logging.error(f"FATAL: An unhandled exception escaped from run_bot: {e}")
+        error = str(e)
+    finally:
+        with _daemon_lock:
+            last_run = dict(_daemon_state['current_run'], finished_at=utc_now().isoformat(), summaries=summaries)
+            if error:
+                last_run['error'] = error
+            _daemon_state['last_run'] = last_run
+            _daemon_state['current_run'] = None
+            _daemon_state['status'] = "idle"
+            _daemon_state['runs'] += 1
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    # The server carries the daemon's current Config as `bot_config`; a reload swaps it.
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if urlparse(self.path).path == "/status":
+            self._reply(200, daemon_status())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        path = urlparse(self.path).path
+        if path == "/trigger":
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._reply(400, {"error": "invalid JSON body"})
+                return
+            names = body.get("accounts") if isinstance(body, dict) else None
+            if names is not None and (not isinstance(names, list) or not all(isinstance(name, str) for name in names)):
+                self._reply(400, {"error": "'accounts' must be a list of account names"})
+                return
+            if names is not None:
+                known = {account['NAME'] for account in get_accounts(self.server.bot_config)}
+                unknown = [name for name in names if name not in known]
+                if unknown:
+                    self._reply(404, {"error": f"unknown account(s): {', '.join(map(str, unknown))}"})
+                    return
+            self._reply(202, request_trigger(names))
+        elif path == "/reload":
+            self._reply(202, request_reload())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def _authorized(self):
+        token = self.server.bot_config.CONTROL_TOKEN
+        if not token or self.headers.get("Authorization") == f"Bearer {token}":
+            return True
+        self._reply(401, {"error": "missing or wrong control token"})
+        return False
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("Control API: %s", format % args)
+
+def start_control_server(config):
+    if config.CONTROL_HOST not in ("127.0.0.1", "localhost", "::1") and not config.CONTROL_TOKEN:
+        logging.warning(f"Control API is listening on '{config.CONTROL_HOST}' without a CONTROL_TOKEN. Anyone who can reach it can trigger runs.")
+    server = ThreadingHTTPServer((config.CONTROL_HOST, config.CONTROL_PORT), ControlRequestHandler)
+    server.bot_config = config
+    threading.Thread(target=server.serve_forever, name="control-api", daemon=True).start()
+    logging.info(f"Control API listening on http://{config.CONTROL_HOST}:{server.server_address[1]} (GET /status, POST /trigger, POST /reload).")
+    return server
+
+def run_daemon(config):
+    jobs = build_schedule_jobs(get_accounts(config), load_scheduler_state(config), utc_now())
+    with _daemon_lock:
+        _daemon_state['started_at'] = _daemon_state['config_loaded_at'] = utc_now().isoformat()
+    try:
+        server = start_control_server(config)
+    except OSError as e:
+        logging.critical(f"Could not start the control API on {config.CONTROL_HOST}:{config.CONTROL_PORT}: {e}")
+        return
+    logging.info(f"Daemon mode enabled. {len(jobs)} schedule(s) configured (CATCH_UP_POLICY: {config.CATCH_UP_POLICY}).")
+
+    try:
+        while True:
+            # Clear before reading the pending requests so a request that arrives meanwhile still wakes the wait below.
+            _daemon_wake.clear()
+            config, jobs = apply_pending_reload(config, jobs)
+            server.bot_config = config
+            now = utc_now()
+            plan_jobs(config, jobs, now)
+            with _daemon_lock:
+                _daemon_state['plans'] = [
+                    {"schedule": job['key'], "start_at": job['plan']['start_at'].isoformat(), "deadline": job['plan']['deadline'].isoformat(),
+                     "predicted_seconds": round(job['plan']['predicted_seconds'], 1), "slack_seconds": round(job['plan']['slack_seconds'], 1),
+                     "fits": job['plan']['slack_seconds'] >= 0}
+                    for job in jobs if job['plan']
+                ]
+            due_accounts = collect_due_accounts(config, jobs, now)
+            triggered_accounts = take_triggered_accounts(config)
+            if due_accounts or triggered_accounts:
+                batch = {account['NAME']: account for account in due_accounts + triggered_accounts}
+                reason = "schedule" if not triggered_accounts else "trigger" if not due_accounts else "schedule+trigger"
+                logging.info(f"Running bot ({reason}) for: {', '.join(batch)}")
+                run_daemon_batch(config, list(batch.values()), reason)
+                save_scheduler_state(config, jobs)
+                continue
+
+            if jobs:
+                next_job = min(jobs, key=job_start)
+                deadline = job_start(next_job)
+                next_run = {"schedule": next_job['key'], "at": deadline.isoformat(), "slot": next_job['next_slot'].isoformat()}
+                logging.info(f"Next run: '{next_job['key']}' at {deadline.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')}. Waiting for it or a trigger...")
+            else:
+                deadline = now + timedelta(seconds=SCHEDULER_MAX_SLEEP_SECONDS)
+                next_run = None
+            with _daemon_lock:
+                _daemon_state['next_run'] = next_run
+            sleep_until(deadline, wake=_daemon_wake)
+    finally:
+        server.shutdown()
@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime, date, timedelta
+
+
+_journal_lock = threading.Lock()
+
+def open_journal(journal_file):
+    connection = sqlite3.connect(journal_file, timeout=30)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_day TEXT NOT NULL,
+            account TEXT NOT NULL,
+            user TEXT NOT NULL,
+            outcome TEXT NOT NULL,
+            attempted_at TEXT NOT NULL
+        )
+    """)
+    connection.execute("CREATE INDEX IF NOT EXISTS attempts_day_account ON attempts (run_day, account, user)")
+    # One row per phase ('phase') and per processed user ('user') of every run; the planner predicts from these.
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS run_timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            run_day TEXT NOT NULL,
+            account TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL,
+            outcome TEXT,
+            seconds REAL NOT NULL,
+            recorded_at TEXT NOT NULL
+        )
+    """)
+    connection.execute("CREATE INDEX IF NOT EXISTS run_timings_account ON run_timings (account, recorded_at)")
+    return connection
+
+def journal_day(account):
+    return datetime.now(account['TIMEZONE']).date().isoformat()
+
+def journal_sent_users(config, account_name, run_day):
+    if not config.JOURNAL_FILE:
+        return set()
+    try:
+        with _journal_lock:
+            connection = open_journal(config.JOURNAL_FILE)
+            try:
+                rows = connection.execute(
+                    "SELECT DISTINCT user FROM attempts WHERE run_day = ? AND account = ? AND outcome IN ('sent', 'unconfirmed')",
+                    (run_day, account_name),
+                ).fetchall()
+            finally:
+                connection.close()
+        return {row[0] for row in rows}
+    except sqlite3.Error as e:
+        logging.warning(f"Could not read run journal '{config.JOURNAL_FILE}': {e}. Processing all users.")
+        return set()
+
+def journal_record(config, account_name, run_day, user, outcome):
+    if not config.JOURNAL_FILE:
+        return
+    try:
+        with _journal_lock:
+            connection = open_journal(config.JOURNAL_FILE)
+            try:
+                with connection:
+                    connection.execute(
+                        "INSERT INTO attempts (run_day, account, user, outcome, attempted_at) VALUES (?, ?, ?, ?, ?)",
+                        (run_day, account_name, user.lower(), outcome, datetime.now().isoformat(timespec='seconds')),
+                    )
+            finally:
+                connection.close()
+    except sqlite3.Error as e:
+        logging.warning(f"Could not write to run journal '{config.JOURNAL_FILE}': {e}")
+
+def journal_record_timings(config, account_name, run_day, metrics):
+    if not config.JOURNAL_FILE:
+        return
+    recorded_at = datetime.now().isoformat(timespec='seconds')
+    rows = [(metrics['run_id'], run_day, account_name, 'phase', phase, None, seconds, recorded_at) for phase, seconds in metrics['phases'].items()]
+    rows += [(metrics['run_id'], run_day, account_name, 'user', user['user'].lower(), user['outcome'], user['seconds'], recorded_at) for user in metrics['users']]
+    try:
+        with _journal_lock:
+            connection = open_journal(config.JOURNAL_FILE)
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO run_timings (run_id, run_day, account, kind, name, outcome, seconds, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+            finally:
+                connection.close()
+    except sqlite3.Error as e:
+        logging.warning(f"Could not write run timings to '{config.JOURNAL_FILE}': {e}")
+
+def journal_timing_history(config, account_name, runs):
+    # The phase and per-user timings of the account's last `runs` runs, newest first.
+    if not config.JOURNAL_FILE or not os.path.exists(config.JOURNAL_FILE):
+        return []
+    try:
+        with _journal_lock:
+            connection = open_journal(config.JOURNAL_FILE)
+            try:
+                run_ids = [row[0] for row in connection.execute(
+                    "SELECT run_id FROM run_timings WHERE account = ? GROUP BY run_id ORDER BY MAX(id) DESC LIMIT ?",
+                    (account_name, runs),
+                ).fetchall()]
+                rows = connection.execute(
+                    f"SELECT run_id, kind, name, seconds FROM run_timings WHERE run_id IN ({', '.join('?' * len(run_ids))})",
+                    run_ids,
+                ).fetchall() if run_ids else []
+            finally:
+                connection.close()
+    except sqlite3.Error as e:
+        logging.warning(f"Could not read run timings from '{config.JOURNAL_FILE}': {e}")
+        return []
+
+    history = {run_id: {"run_id": run_id, "phases": {}, "users": {}} for run_id in run_ids}
+    for run_id, kind, name, seconds in rows:
+        history[run_id]['phases' if kind == 'phase' else 'users'][name] = seconds
+    return [history[run_id] for run_id in run_ids]
+
+def print_journal_report(config, days=14, user_filter=None):
+    journal_file = config.JOURNAL_FILE
+    if not journal_file or not os.path.exists(journal_file):
+        print(f"No run journal found at '{journal_file}'.")
+        return
+    if user_filter:
+        user_filter = user_filter.lower()
+
+    since = (date.today() - timedelta(days=days)).isoformat()
+    query = "SELECT run_day, account, user, outcome, attempted_at FROM attempts WHERE run_day >= ?"
+    params = [since]
+    if user_filter:
+        query += " AND user = ?"
+        params.append(user_filter)
+    query += " ORDER BY account, user, attempted_at"
+
+    connection = open_journal(journal_file)
+    try:
+        rows = connection.execute(query, params).fetchall()
+    finally:
+        connection.close()
+    if not rows:
+        print(f"No journal entries in the last {days} days.")
+        return
+
+    history = {}
+    for run_day, account_name, user, outcome, attempted_at in rows:
+        history.setdefault((account_name, user), []).append((run_day, outcome, attempted_at))
+
+    print(f"Run journal for the last {days} days ('{journal_file}'):")
+    for (account_name, user), attempts in history.items():
+        sent_days = {run_day for run_day, outcome, _ in attempts if outcome == 'sent'}
+        unconfirmed_days = {run_day for run_day, outcome, _ in attempts if outcome == 'unconfirmed'} - sent_days
+        print(f"\n{account_name} -> {user}: sent on {len(sent_days)} day(s), "
+              + (f"unconfirmed on {len(unconfirmed_days)} day(s), " if unconfirmed_days else "")
+              + f"{len(attempts)} attempt(s)")
+        for run_day, outcome, attempted_at in attempts:
+            print(f"    {run_day}  {attempted_at}  {outcome}")
@@ -0,0 +1,139 @@
+import os
+import time
+import json
+import glob
+import gzip
+import queue
+import atexit
+import shutil
+import logging
+import logging.handlers
+import contextvars
+from datetime import datetime
+from contextlib import contextmanager
+
+
+_log_fields = contextvars.ContextVar('log_fields', default={})
+LOG_CONTEXT_FIELDS = ('run_id', 'account', 'user', 'phase')
+
+@contextmanager
+def log_fields(**fields):
+    token = _log_fields.set(dict(_log_fields.get(), **fields))
+    try:
+        yield
+    finally:
+        _log_fields.reset(token)
+
+class LogContextFilter(logging.Filter):
+    def filter(self, record):
+        fields = _log_fields.get()
+        for name in LOG_CONTEXT_FIELDS:
+            setattr(record, name, fields.get(name))
+        return True
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The queue never leaves the process, so skip QueueHandler's eager formatting; the listener thread formats instead.
+    def prepare(self, record):
+        return record
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for name in LOG_CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def compress_log_segment(source, dest):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    def __init__(self, filename, max_bytes=0, when=None, backup_count=0, compress=False):
+        super().__init__(filename, when=when or 'midnight', backupCount=backup_count, encoding='utf-8', delay=True)
+        self.rotate_on_time = bool(when)
+        self.max_bytes = max_bytes
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = compress_log_segment
+
+    def shouldRollover(self, record):
+        if self.rotate_on_time and time.time() >= self.rolloverAt:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        destination = self.rotation_filename(f"{self.baseFilename}.{stamp}")
+        suffix = 1
+        while os.path.exists(destination):
+            destination = self.rotation_filename(f"{self.baseFilename}.{stamp}-{suffix}")
+            suffix += 1
+        if os.path.exists(self.baseFilename):
+            self.rotate(self.baseFilename, destination)
+        if self.backupCount > 0:
+            segments = sorted(glob.glob(glob.escape(self.baseFilename) + ".*"), key=os.path.getmtime)
+            for old_segment in segments[:-self.backupCount]:
+                os.remove(old_segment)
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+_log_listener = None
+
+def setup_logging(log_filename, text_format, level="INFO", json_lines=False, max_bytes=0, rotate_when=None, backup_count=0, compress=False):
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+    else:
+        atexit.register(stop_logging)
+
+    file_handler = SizeAndTimeRotatingFileHandler(log_filename, max_bytes=max_bytes, when=rotate_when, backup_count=backup_count, compress=compress)
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(text_format))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(text_format))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(LogContextFilter())
+
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+    logging.root.addHandler(queue_handler)
+    logging.root.setLevel(level)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+
+def configure_logging(config):
+    setup_logging(
+        config.LOG_FILENAME,
+        config.LOG_FORMAT,
+        level=config.LOG_LEVEL,
+        json_lines=config.LOG_JSON,
+        max_bytes=config.LOG_MAX_BYTES,
+        rotate_when=config.LOG_ROTATE_WHEN,
+        backup_count=config.LOG_BACKUP_COUNT,
+        compress=config.LOG_COMPRESS,
+    )
+
+def stop_logging():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
@@ -0,0 +1,156 @@
+import os
+import time
+import json
+import uuid
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+from .logs import log_fields
+
+
+@contextmanager
+def timed_phase(timings, phase):
+    start = time.perf_counter()
+    try:
+        with log_fields(phase=phase):
+            yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+def log_phase_timings(config, timings):
+    if not timings:
+        return
+    total = sum(timings.values())
+    breakdown = ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in timings.items())
+    mode = "latency budget" if config.LATENCY_BUDGET_MODE else "standard"
+    logging.info(f"Phase timings ({mode} mode, {total:.1f}s total): {breakdown}")
+
+def new_run_metrics(account_name):
+    return {
+        "run_id": uuid.uuid4().hex[:12],
+        "account": account_name,
+        "started_at": time.time(),
+        "duration": 0.0,
+        "phases": {},
+        "round_trips": 0,
+        "http_requests": 0,
+        "users": [],
+    }
+
+def track_round_trips(driver, metrics):
+    # Every WebDriver command (including WebElement calls) goes through driver.execute().
+    if not hasattr(driver, 'round_trip_metrics'):
+        original_execute = driver.execute
+        def counting_execute(driver_command, params=None):
+            current = driver.round_trip_metrics
+            if current is not None:
+                current['round_trips'] += 1
+            return original_execute(driver_command, params)
+        driver.execute = counting_execute
+    driver.round_trip_metrics = metrics
+
+_latest_metrics = {}
+_latest_plans = {}
+_metrics_lock = threading.Lock()
+PROFILE_NEXT_RUN = False
+
+def prometheus_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def write_prometheus_textfile(textfile):
+    lines = [
+        "# HELP tiktok_streak_bot_last_run_timestamp_seconds Start time of the last run.",
+        "# TYPE tiktok_streak_bot_last_run_timestamp_seconds gauge",
+    ]
+    runs = sorted(_latest_metrics.values(), key=lambda item: item[0]['account'])
+    for metrics, summary in runs:
+        lines.append(f'tiktok_streak_bot_last_run_timestamp_seconds{{account="{prometheus_label(metrics["account"])}"}} {metrics["started_at"]:.0f}')
+    lines += ["# HELP tiktok_streak_bot_run_duration_seconds Wall time of the last run.", "# TYPE tiktok_streak_bot_run_duration_seconds gauge"]
+    for metrics, summary in runs:
+        lines.append(f'tiktok_streak_bot_run_duration_seconds{{account="{prometheus_label(metrics["account"])}"}} {metrics["duration"]:.3f}')
+    lines += ["# HELP tiktok_streak_bot_phase_seconds Time spent per phase in the last run.", "# TYPE tiktok_streak_bot_phase_seconds gauge"]
+    for metrics, summary in runs:
+        for phase, seconds in metrics['phases'].items():
+            lines.append(f'tiktok_streak_bot_phase_seconds{{account="{prometheus_label(metrics["account"])}",phase="{phase}"}} {seconds:.3f}')
+    lines += ["# HELP tiktok_streak_bot_webdriver_round_trips WebDriver commands issued in the last run.", "# TYPE tiktok_streak_bot_webdriver_round_trips gauge"]
+    for metrics, summary in runs:
+        lines.append(f'tiktok_streak_bot_webdriver_round_trips{{account="{prometheus_label(metrics["account"])}"}} {metrics["round_trips"]}')
+    lines += ["# HELP tiktok_streak_bot_browser_memory_peak_bytes Peak RSS of the browser process tree in the last run.", "# TYPE tiktok_streak_bot_browser_memory_peak_bytes gauge"]
+    for metrics, summary in runs:
+        if 'memory_peak_mb' in metrics:
+            lines.append(f'tiktok_streak_bot_browser_memory_peak_bytes{{account="{prometheus_label(metrics["account"])}"}} {metrics["memory_peak_mb"] * 1048576:.0f}')
+    lines += ["# HELP tiktok_streak_bot_users Users per outcome in the last run.", "# TYPE tiktok_streak_bot_users gauge"]
+    for metrics, summary in runs:
+        for outcome in ('sent', 'failed', 'unconfirmed', 'skipped'):
+            lines.append(f'tiktok_streak_bot_users{{account="{prometheus_label(metrics["account"])}",outcome="{outcome}"}} {summary[outcome]}')
+    lines += ["# HELP tiktok_streak_bot_user_seconds Time spent on each user in the last run.", "# TYPE tiktok_streak_bot_user_seconds gauge"]
+    for metrics, summary in runs:
+        for user in metrics['users']:
+            lines.append(f'tiktok_streak_bot_user_seconds{{account="{prometheus_label(metrics["account"])}",user="{prometheus_label(user["user"])}",outcome="{user["outcome"]}"}} {user["seconds"]:.3f}')
+    plans = sorted(_latest_plans.values(), key=lambda plan: plan['account'])
+    lines += ["# HELP tiktok_streak_bot_plan_predicted_seconds Predicted duration of the next run.", "# TYPE tiktok_streak_bot_plan_predicted_seconds gauge"]
+    for plan in plans:
+        lines.append(f'tiktok_streak_bot_plan_predicted_seconds{{account="{prometheus_label(plan["account"])}"}} {plan["predicted_seconds"]:.3f}')
+    lines += ["# HELP tiktok_streak_bot_plan_slack_seconds Time to spare before the deadline and safety margin for the next run. Negative means it does not fit.", "# TYPE tiktok_streak_bot_plan_slack_seconds gauge"]
+    for plan in plans:
+        lines.append(f'tiktok_streak_bot_plan_slack_seconds{{account="{prometheus_label(plan["account"])}"}} {plan["slack_seconds"]:.3f}')
+
+    temp_path = f"{textfile}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, textfile)
+
+def export_run_metrics(config, metrics, summary):
+    metrics['duration'] = time.time() - metrics['started_at']
+    if metrics['users'] and metrics['round_trips']:
+        logging.info(f"Run {metrics['run_id']}: {metrics['round_trips']} WebDriver round trips, {metrics['round_trips'] / len(metrics['users']):.1f} per user.")
+    if metrics['http_requests']:
+        logging.info(f"Run {metrics['run_id']}: {metrics['http_requests']} HTTP transport requests.")
+    try:
+        if config.METRICS_JSON_DIR:
+            os.makedirs(config.METRICS_JSON_DIR, exist_ok=True)
+            path = os.path.join(config.METRICS_JSON_DIR, f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{metrics['run_id']}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(dict(metrics, summary=summary), f, indent=4, ensure_ascii=False)
+            logging.info(f"Run metrics written to '{path}'.")
+        if config.METRICS_TEXTFILE:
+            with _metrics_lock:
+                _latest_metrics[metrics['account']] = (metrics, summary)
+                write_prometheus_textfile(config.METRICS_TEXTFILE)
+    except (IOError, OSError) as e:
+        logging.warning(f"Could not export run metrics: {e}")
+
+def publish_plan(config, plan):
+    if not config.METRICS_TEXTFILE:
+        return
+    try:
+        with _metrics_lock:
+            _latest_plans[plan['account']] = plan
+            write_prometheus_textfile(config.METRICS_TEXTFILE)
+    except (IOError, OSError) as e:
+        logging.warning(f"Could not export the run plan: {e}")
+
+def request_profile():
+    global PROFILE_NEXT_RUN
+    with _metrics_lock:
+        PROFILE_NEXT_RUN = True
+
+def take_profile_request():
+    global PROFILE_NEXT_RUN
+    with _metrics_lock:
+        requested = PROFILE_NEXT_RUN
+        PROFILE_NEXT_RUN = False
+    return requested
+
+def write_profile(config, profiler, account_name):
+    import pstats
+
+    directory = config.METRICS_JSON_DIR or "."
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"profile-{account_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.prof")
+    profiler.dump_stats(path)
+    logging.info(f"cProfile stats written to '{path}'. Open them with: python -m pstats {path}")
+    stats = pstats.Stats(profiler).sort_stats('cumulative')
+    stats.print_stats(15)
@@ -0,0 +1,602 @@
+import time
+import json
+import random
+import logging
+import threading
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, ElementNotInteractableException, WebDriverException
+
+from .metrics import timed_phase
+
+
+MESSAGE_LIST_CONTAINER_XPATH = '//*[@id="app"]/div[2]/div[1]/div/div[4]/div/div/div[2]'
+CONVERSATION_ITEM_XPATH = "//div[@data-e2e='chat-list-item']"
+NICKNAME_CLASS_PARTIAL = "PInfoNickname"
+NICKNAME_XPATH_INSIDE_ITEM = f".//p[contains(@class, '{NICKNAME_CLASS_PARTIAL}')]"
+CLICK_TARGET_XPATH = '//*[@id="main-content-messages"]/div/div[3]/div[4]/div'
+WRITE_TARGET_XPATH = '//*[@id="main-content-messages"]/div/div[3]/div[4]/div/div[1]/div/div[2]/div[2]/div/div/div/div'
+TOAST_XPATH = "//li[@data-sonner-toast]"
+PASSKEY_LATER_LABELS = ('Belki daha sonra', 'Maybe later', 'Not now', 'Später', 'Nicht jetzt', 'Plus tard', 'Más tarde', 'Ahora no',
+                        'Mais tarde', 'Agora não', 'Più tardi', 'Non ora', 'Misschien later', 'Może później', 'Nanti saja', 'Để sau')
+
+# Every logical element is an ordered chain of XPath candidates: data-e2e first, then role/aria, class fragments, and the
+# original absolute path last. The candidate that matched last time is tried first.
+SELECTORS = {
+    "message_list": [
+        "(//div[@data-e2e='chat-list-item'])[1]/..",
+        "//*[@role='list' and .//p[contains(@class, 'PInfoNickname')]]",
+        MESSAGE_LIST_CONTAINER_XPATH,
+    ],
+    "conversation_item": [
+        CONVERSATION_ITEM_XPATH,
+        "//*[@role='listitem' and .//p[contains(@class, 'PInfoNickname')]]",
+        "//p[contains(@class, 'PInfoNickname')]/ancestor::div[1]",
+    ],
+    "click_target": [
+        "//*[@data-e2e='message-input-area']",
+        "//*[@id='main-content-messages']//div[contains(@class, 'InputAreaContainer')]",
+        CLICK_TARGET_XPATH,
+    ],
+    "write_target": [
+        "//*[@data-e2e='message-input-area']//div[@contenteditable='true']",
+        "//*[@id='main-content-messages']//div[@role='textbox' and @contenteditable='true']",
+        "//*[@id='main-content-messages']//div[contains(@class, 'DraftEditor')]//div[@contenteditable='true']",
+        WRITE_TARGET_XPATH,
+    ],
+    "chat_header_name": [
+        "//*[@id='main-content-messages']//*[@data-e2e='chat-nickname']",
+        "//*[@id='main-content-messages']//*[@data-e2e='chat-uniqueid']",
+        "//*[@id='main-content-messages']//*[contains(@class, 'PNickname') or contains(@class, 'PUniqueId')]",
+    ],
+    "passkey_later": [
+        "//div[@role='dialog']//button[" + " or ".join(f"contains(., '{label}')" for label in PASSKEY_LATER_LABELS) + "]",
+    ],
+}
+
+def pause_duration(config, low, high):
+    if config.LATENCY_BUDGET_MODE:
+        return random.uniform(config.MIN_HUMAN_JITTER_SECONDS, config.MIN_HUMAN_JITTER_SECONDS * 2)
+    return random.uniform(low, high)
+
+def human_pause(config, low, high=None):
+    time.sleep(pause_duration(config, low, low if high is None else high))
+
+DOM_SETTLED_SCRIPT = """
+var xpath = arguments[0], quietMs = arguments[1], done = arguments[arguments.length - 1];
+var timer = null;
+function present() {
+    return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;
+}
+var observer = new MutationObserver(function() {
+    if (present()) {
+        clearTimeout(timer);
+        timer = setTimeout(finish, quietMs);
+    }
+});
+function finish() {
+    observer.disconnect();
+    done(true);
+}
+observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+if (present()) {
+    timer = setTimeout(finish, quietMs);
+}
+"""
+
+def wait_for_dom_settled(driver, xpath, quiet_ms=300, timeout=30):
+    try:
+        driver.set_script_timeout(timeout)
+        driver.execute_async_script(DOM_SETTLED_SCRIPT, xpath, quiet_ms)
+        logging.info(f"DOM settled around: {xpath}")
+        return True
+    except TimeoutException:
+        logging.info(f"DOM did not settle around {xpath} within {timeout:.1f}s.")
+        return False
+
+def wait_for_ready(config, driver, xpath, low, high):
+    if not config.LATENCY_BUDGET_MODE:
+        human_pause(config, low, high)
+        return
+    # Never slower than the fixed sleep it replaces: the settle wait and the jitter after it share a budget of `high` seconds.
+    started = time.monotonic()
+    wait_for_dom_settled(driver, xpath, timeout=high)
+    time.sleep(min(pause_duration(config, low, high), max(0.0, high - (time.monotonic() - started))))
+
+SELECTOR_PROBE_SCRIPT = """
+var candidates = arguments[0], wantVisible = arguments[1];
+function usable(node) {
+    if (!wantVisible) { return true; }
+    var rect = node.getBoundingClientRect(), style = window.getComputedStyle(node);
+    return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none'
+        && !node.disabled && node.getAttribute('aria-disabled') !== 'true';
+}
+var report = [];
+for (var i = 0; i < candidates.length; i++) {
+    var nodes;
+    try {
+        nodes = document.evaluate(candidates[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    } catch (e) {
+        report.push({matches: 0, usable: 0, error: String(e)});
+        continue;
+    }
+    var found = null, count = 0;
+    for (var j = 0; j < nodes.snapshotLength; j++) {
+        if (usable(nodes.snapshotItem(j))) {
+            count++;
+            if (!found) { found = nodes.snapshotItem(j); }
+        }
+    }
+    report.push({matches: nodes.snapshotLength, usable: count});
+    if (found) {
+        return {index: i, element: found, report: report};
+    }
+}
+// Finished requests, so a page still fetching its data doesn't look settled. The buffer grows before it fills up and stops counting.
+var resources = performance.getEntriesByType('resource').length;
+if (resources >= 200) { performance.setResourceTimingBufferSize(resources + 250); }
+return {index: null, element: null, report: report, nodes: document.getElementsByTagName('*').length, ready: document.readyState,
+        url: location.href, title: document.title, resources: resources};
+"""
+
+SELECTOR_POLL_SECONDS = 0.25
+_selector_winners = {}
+_selector_lock = threading.Lock()
+
+def selector_candidates(name):
+    candidates = SELECTORS[name]
+    with _selector_lock:
+        winner = _selector_winners.get(name)
+    if winner in candidates:
+        return [winner] + [candidate for candidate in candidates if candidate != winner]
+    return list(candidates)
+
+def selector_xpath(name):
+    return selector_candidates(name)[0]
+
+def any_selector_xpath(name):
+    return " | ".join(SELECTORS[name])
+
+def describe_selector_miss(name, candidates, result, settled, timeout):
+    reason = "the page stopped changing" if settled else f"waiting {timeout}s"
+    details = "; ".join(
+        f"{candidate} -> " + (f"error: {entry['error']}" if entry.get('error') else f"{entry.get('matches', 0)} match(es), {entry.get('usable', 0)} usable")
+        for candidate, entry in zip(candidates, result.get('report') or [])
+    )
+    return f"No candidate for '{name}' matched after {reason} on {result.get('url')} ('{result.get('title')}'): {details}"
+
+def wait_for_selector(config, driver, name, timeout=15, visible=False, optional=False):
+    # One script call probes every candidate, so a poll costs one round trip no matter how long the chain is.
+    candidates = selector_candidates(name)
+    started = time.monotonic()
+    quiet_since = started
+    last_shape = None
+    while True:
+        result = driver.execute_script(SELECTOR_PROBE_SCRIPT, candidates, visible) or {}
+        index = result.get('index')
+        if index is not None:
+            with _selector_lock:
+                previous = _selector_winners.get(name)
+                _selector_winners[name] = candidates[index]
+            if previous != candidates[index] and candidates[index] != SELECTORS[name][0]:
+                logging.info(f"Selector '{name}' matched fallback candidate: {candidates[index]}")
+            return result['element']
+
+        now = time.monotonic()
+        shape = (result.get('nodes'), result.get('ready'), result.get('url'), result.get('resources'))
+        if shape != last_shape or result.get('ready') != 'complete':
+            last_shape = shape
+            quiet_since = now
+        # A page that has finished loading, stopped changing and stopped fetching is not going to grow the element; don't wait out the timeout.
+        settled = bool(config.SELECTOR_FAIL_FAST_SECONDS) and now - quiet_since >= config.SELECTOR_FAIL_FAST_SECONDS
+        if settled or now - started >= timeout:
+            message = describe_selector_miss(name, candidates, result, settled, timeout)
+            if optional:
+                logging.debug(message)
+            else:
+                logging.error(message)
+            raise TimeoutException(message)
+        time.sleep(SELECTOR_POLL_SECONDS)
+
+def wait_for_message_sent(config, driver, write_target, low, high):
+    if config.LATENCY_BUDGET_MODE:
+        try:
+            WebDriverWait(driver, 5, poll_frequency=0.2).until(lambda d: not write_target.text.strip())
+            logging.info("Message box cleared after sending.")
+        except TimeoutException:
+            logging.warning("Message box did not clear within 5s after sending.")
+        except StaleElementReferenceException:
+            pass
+    human_pause(config, low, high)
+
+CONVERSATION_INDEX_SCRIPT = """
+var itemXpath = arguments[0], nicknameXpath = arguments[1], wanted = arguments[2];
+var items = document.evaluate(itemXpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var found = {};
+for (var i = 0; i < items.snapshotLength; i++) {
+    var item = items.snapshotItem(i);
+    var nickname = document.evaluate(nicknameXpath, item, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (!nickname) continue;
+    var text = (nickname.innerText || nickname.textContent || '').trim().toLowerCase();
+    if (wanted.indexOf(text) !== -1 && !(text in found)) {
+        found[text] = {element: item, index: i};
+    }
+}
+return {total: items.snapshotLength, found: found};
+"""
+
+SCROLL_IF_ATTACHED_SCRIPT = "if (!arguments[0].isConnected) { return false; } arguments[0].scrollIntoView(true); return true;"
+
+def new_conversation_index(usernames):
+    return {
+        "usernames": [u.lower() for u in usernames],
+        "entries": None,
+        "total": 0,
+        "builds": 0,
+        "round_trips": 0,
+        "naive_round_trips": 0,
+    }
+
+def build_conversation_index(config, driver, index):
+    logging.info("Waiting for conversation items...")
+    wait_for_selector(config, driver, 'conversation_item', timeout=30)
+    item_xpath = selector_xpath('conversation_item')
+    wait_for_ready(config, driver, item_xpath, 2, 4)
+
+    result = driver.execute_script(CONVERSATION_INDEX_SCRIPT, item_xpath, NICKNAME_XPATH_INSIDE_ITEM, index['usernames'])
+    index['entries'] = result.get('found') or {}
+    index['total'] = int(result.get('total') or 0)
+    index['builds'] += 1
+    index['round_trips'] += 2
+    logging.info(f"Indexed {index['total']} conversation items in one pass; {len(index['entries'])}/{len(index['usernames'])} target users present.")
+
+def log_conversation_index_stats(index):
+    if not index['builds']:
+        return
+    saved = index['naive_round_trips'] - index['round_trips']
+    logging.info(f"Conversation index: {index['builds']} build(s), {index['round_trips']} WebDriver round trips instead of ~{index['naive_round_trips']} (saved ~{max(saved, 0)}).")
+
+def note_failure(failure, kind):
+    if failure is not None:
+        failure['kind'] = kind
+
+def find_and_click_conversation(config, driver, username, index=None, failure=None):
+    logging.info(f"Searching for conversation with '{username}'...")
+    if index is None:
+        index = new_conversation_index([username])
+    key = username.lower()
+    try:
+        if index['entries'] is None or key not in index['usernames']:
+            if key not in index['usernames']:
+                index['usernames'].append(key)
+            build_conversation_index(config, driver, index)
+
+        for attempt in range(2):
+            if not index['total']:
+                logging.warning("No conversation items found!")
+                note_failure(failure, 'no_conversations')
+                return False
+
+            entry = index['entries'].get(key)
+            # Per-item scanning cost one find_elements plus two calls per item up to the match.
+            scanned = entry['index'] + 1 if entry else index['total']
+            index['naive_round_trips'] += 2 + 2 * scanned
+
+            if not entry:
+                logging.warning(f"'{username}' not found in the {index['total']} items.")
+                note_failure(failure, 'not_found')
+                return False
+
+            item = entry['element']
+            try:
+                index['round_trips'] += 1
+                if not driver.execute_script(SCROLL_IF_ATTACHED_SCRIPT, item):
+                    raise StaleElementReferenceException("Conversation item detached from the DOM.")
+                logging.info(f"Found '{username}' at item #{entry['index']+1}. Clicking...")
+                human_pause(config, 0.5)
+                index['round_trips'] += 1
+                item.click()
+                wait_for_ready(config, driver, any_selector_xpath('click_target'), 3, 5)
+                return True
+            except StaleElementReferenceException:
+                if attempt:
+                    raise
+                logging.warning("Conversation list re-rendered. Rebuilding the conversation index...")
+                build_conversation_index(config, driver, index)
+
+    except TimeoutException:
+        logging.error("Timeout waiting for conversation items.")
+        note_failure(failure, 'TimeoutException')
+        return False
+    except Exception as e:
+        logging.error(f"Unexpected error searching/clicking conversation: {e}")
+        note_failure(failure, type(e).__name__)
+        return False
+    return False
+
+_conversation_cache_lock = threading.Lock()
+
+def read_conversation_cache(config):
+    try:
+        with open(config.CONVERSATION_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (ValueError, OSError) as e:
+        logging.warning(f"Could not read conversation cache '{config.CONVERSATION_CACHE_FILE}' ({e}). Starting with an empty one.")
+        return {}
+
+def load_conversation_urls(config, account_name):
+    if not config.CONVERSATION_CACHE_FILE:
+        return {}
+    with _conversation_cache_lock:
+        return dict(read_conversation_cache(config).get(account_name) or {})
+
+def store_conversation_url(config, account_name, username, url):
+    if not config.CONVERSATION_CACHE_FILE:
+        return
+    # Accounts running in parallel share the file, so re-read it under the lock instead of writing back a stale copy.
+    with _conversation_cache_lock:
+        cache = read_conversation_cache(config)
+        urls = cache.setdefault(account_name, {})
+        if url:
+            urls[username.lower()] = url
+        else:
+            urls.pop(username.lower(), None)
+        try:
+            with open(config.CONVERSATION_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=4)
+        except IOError as e:
+            logging.warning(f"Could not write conversation cache '{config.CONVERSATION_CACHE_FILE}': {e}")
+
+CHAT_HEADER_NAMES_SCRIPT = """
+var names = [];
+arguments[0].forEach(function(xpath) {
+    var nodes = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (var i = 0; i < nodes.snapshotLength; i++) {
+        names.push((nodes.snapshotItem(i).innerText || nodes.snapshotItem(i).textContent || '').trim());
+    }
+});
+return names;
+"""
+
+def open_chat_is_with(config, driver, username):
+    # The input area is there whenever any chat is open; only the chat header says whose it is.
+    try:
+        wait_for_selector(config, driver, 'chat_header_name', timeout=10, optional=True)
+        names = driver.execute_script(CHAT_HEADER_NAMES_SCRIPT, SELECTORS['chat_header_name']) or []
+    except (TimeoutException, WebDriverException):
+        logging.warning(f"Could not read the open chat's header to confirm it is '{username}'.")
+        return False
+    if username.lower() in {name.lstrip('@').lower() for name in names}:
+        return True
+    logging.warning(f"The open chat is not '{username}' (header shows: {', '.join(names) or 'nothing'}).")
+    return False
+
+def open_cached_conversation(config, driver, username, url, index):
+    logging.info(f"Opening cached conversation URL for '{username}': {url}")
+    try:
+        # A tab opened by the multi-tab mode may already be on (or loading) this URL.
+        if driver.current_url != url:
+            driver.get(url)
+        # The page was reloaded, so any indexed list elements are gone.
+        index['entries'] = None
+        wait_for_selector(config, driver, 'click_target', timeout=15, visible=True, optional=True)
+        if "login" in driver.current_url.lower():
+            logging.warning(f"Cached conversation URL for '{username}' redirected to the login page.")
+            return False
+        wait_for_ready(config, driver, any_selector_xpath('click_target'), 1, 2)
+        return open_chat_is_with(config, driver, username)
+    except TimeoutException:
+        logging.warning(f"Cached conversation URL for '{username}' did not open a chat.")
+        return False
+    except WebDriverException as e:
+        logging.warning(f"Cached conversation URL for '{username}' failed to load: {type(e).__name__}")
+        return False
+
+def send_message_in_open_chat(config, driver, message, failure=None):
+    logging.info("Attempting to send message in the open chat...")
+    click_target = None
+    write_target = None
+
+    try:
+        try:
+            logging.debug("Waiting for potential toast notification to disappear...")
+            WebDriverWait(driver, 7).until(EC.invisibility_of_element_located((By.XPATH, TOAST_XPATH)))
+            logging.info("Toast notification (if any) disappeared.")
+        except TimeoutException:
+            logging.debug("Toast notification not found or did not disappear in time.")
+        except Exception as e:
+            logging.warning(f"Error waiting for toast: {e}")
+
+        logging.info("Waiting for the click target area...")
+        try:
+            click_target = wait_for_selector(config, driver, 'click_target', timeout=15, visible=True)
+            logging.info("Click target found and clickable.")
+        except TimeoutException:
+            logging.error("Could not find clickable target!")
+            note_failure(failure, 'TimeoutException')
+            return False
+
+        logging.info("Clicking the target area...")
+        try:
+            driver.execute_script("arguments[0].scrollIntoView(true);", click_target)
+            human_pause(config, 0.5)
+            click_target.click()
+            logging.info("Clicked target area.")
+            human_pause(config, 1.5, 2.5)
+        except Exception as click_err:
+            logging.warning(f"Normal click failed ({type(click_err).__name__}). Trying JS click...")
+            try:
+                driver.execute_script("arguments[0].scrollIntoView(true);", click_target)
+                human_pause(config, 0.3)
+                driver.execute_script("arguments[0].click();", click_target)
+                logging.info("Clicked via Javascript.")
+                human_pause(config, 1.5, 2.5)
+            except Exception as js_click_err:
+                 logging.error(f"Javascript click also failed: {js_click_err}")
+                 note_failure(failure, type(js_click_err).__name__)
+                 return False
+
+        logging.info("Waiting for the write target area...")
+        try:
+            write_target = wait_for_selector(config, driver, 'write_target', timeout=15, visible=True)
+            logging.info("Found the write target area.")
+            try:
+                driver.execute_script("arguments[0].focus();", write_target)
+                logging.info("Focused the write target area.")
+                human_pause(config, 0.5)
+            except Exception as focus_err:
+                logging.warning(f"Could not focus write target area (may be okay): {focus_err}")
+
+        except TimeoutException:
+             logging.error("Could not find the write target area after clicking!")
+             note_failure(failure, 'TimeoutException')
+             return False
+
+        logging.info(f"Sending keys to write target: '{message}'")
+        try:
+             WebDriverWait(driver, 5).until(EC.element_to_be_clickable(write_target))
+             write_target.send_keys(message)
+             human_pause(config, 0.8, 1.5)
+             write_target.send_keys(Keys.ENTER)
+             logging.info("Message sent (Enter key pressed).")
+             wait_for_message_sent(config, driver, write_target, 2, 4)
+             return True
+        except ElementNotInteractableException as send_keys_err:
+             logging.warning(f"Normal send_keys failed ({type(send_keys_err).__name__}). Trying JS value set...")
+             try:
+                 driver.execute_script("arguments[0].textContent = arguments[1];", write_target, message)
+                 human_pause(config, 0.5, 1.0)
+                 write_target.send_keys(Keys.ENTER)
+                 logging.info("Set value via JS and pressed Enter.")
+                 wait_for_message_sent(config, driver, write_target, 2, 4)
+                 return True
+             except Exception as js_err:
+                 logging.error(f"JS value set or subsequent Enter failed: {type(js_err).__name__} - {js_err}")
+                 logging.exception("Traceback:")
+                 note_failure(failure, type(js_err).__name__)
+                 return False
+        except Exception as other_send_err:
+            logging.error(f"Error during send_keys or Enter: {type(other_send_err).__name__} - {other_send_err}")
+            logging.exception("Traceback:")
+            note_failure(failure, type(other_send_err).__name__)
+            return False
+
+    except Exception as e:
+        logging.error(f"General error in send_message_in_open_chat: {e}")
+        logging.exception(e)
+        note_failure(failure, type(e).__name__)
+        return False
+
+def handle_passkey_popup(config, driver):
+    logging.info("Checking for the 'passkey' creation popup...")
+    try:
+        maybe_later_button = wait_for_selector(config, driver, 'passkey_later', timeout=15, visible=True, optional=True)
+        logging.info("Passkey popup found. Clicking 'Maybe later'...")
+        maybe_later_button.click()
+        logging.info("Waiting for the passkey popup to disappear...")
+        WebDriverWait(driver, 15).until(
+            EC.invisibility_of_element_located((By.XPATH, any_selector_xpath('passkey_later')))
+        )
+        logging.info("Passkey popup dismissed successfully.")
+    except TimeoutException:
+        logging.info("Passkey popup did not appear or was already gone, continuing...")
+    except Exception as e:
+        logging.warning(f"An error occurred while handling the passkey popup: {e}")
+
+class CircuitBreakerOpen(Exception):
+    pass
+
+def is_logged_out(driver):
+    try:
+        if "login" in driver.current_url.lower():
+            return True
+        return driver.get_cookie("sessionid") is None
+    except Exception as e:
+        logging.warning(f"Could not check login state: {e}")
+        return False
+
+def retry_delay(config, attempt):
+    delay = min(config.RETRY_POLICY['MAX_DELAY_SECONDS'], config.RETRY_POLICY['BASE_DELAY_SECONDS'] * (2 ** (attempt - 1)))
+    return random.uniform(delay / 2, delay)
+
+def reload_messages_page(config, driver, conversation_index):
+    logging.info(f"Reloading '{config.TIKTOK_MESSAGES_URL}' before retrying...")
+    driver.get(config.TIKTOK_MESSAGES_URL)
+    handle_passkey_popup(config, driver)
+    try:
+        wait_for_selector(config, driver, 'message_list', timeout=35)
+    except TimeoutException:
+        logging.warning("Message list container not found after reloading.")
+    conversation_index['entries'] = None
+
+def open_conversation(config, driver, user, account, conversation_index, conversation_urls, failure):
+    cached_url = conversation_urls.get(user.lower())
+    if cached_url:
+        if open_cached_conversation(config, driver, user, cached_url, conversation_index):
+            return True
+        logging.info(f"Forgetting the cached conversation URL for '{user}' and falling back to the conversation list.")
+        conversation_urls.pop(user.lower(), None)
+        store_conversation_url(config, account['NAME'], user, None)
+        try:
+            reload_messages_page(config, driver, conversation_index)
+        except WebDriverException as e:
+            logging.error(f"Reloading the messages page failed: {type(e).__name__}")
+            note_failure(failure, type(e).__name__)
+            return False
+
+    list_url = driver.current_url
+    if not find_and_click_conversation(config, driver, user, conversation_index, failure):
+        return False
+    # Only a URL that changed with the click, on a chat whose header confirms the user, identifies the conversation.
+    chat_url = driver.current_url
+    if (chat_url != list_url and chat_url.rstrip('/') != config.TIKTOK_MESSAGES_URL.rstrip('/') and conversation_urls.get(user.lower()) != chat_url
+            and open_chat_is_with(config, driver, user)):
+        conversation_urls[user.lower()] = chat_url
+        store_conversation_url(config, account['NAME'], user, chat_url)
+        logging.info(f"Cached the conversation URL for '{user}' for direct navigation next time.")
+    return True
+
+def process_user(config, driver, user, account, conversation_index, timings, conversation_urls=None):
+    loggable_user = ''.join(c for c in user if c.isprintable())
+    max_attempts = config.RETRY_POLICY['MAX_ATTEMPTS']
+    if conversation_urls is None:
+        conversation_urls = {}
+    for attempt in range(1, max_attempts + 1):
+        failure = {}
+        with timed_phase(timings, 'find_conversation'):
+            opened = open_conversation(config, driver, user, account, conversation_index, conversation_urls, failure)
+        if opened:
+            with timed_phase(timings, 'send_message'):
+                if send_message_in_open_chat(config, driver, account['MESSAGE_TO_SEND'], failure):
+                    return 'sent'
+            outcome = 'send_failed'
+            logging.warning(f"Opened chat for '{loggable_user}' but FAILED TO SEND a message (attempt {attempt}/{max_attempts}).")
+        else:
+            outcome = 'not_found'
+            logging.warning(f"Could not find or click conversation for '{loggable_user}' (attempt {attempt}/{max_attempts}).")
+
+        if is_logged_out(driver):
+            raise CircuitBreakerOpen("Session is logged out. Aborting the run; refresh the cookies file.")
+
+        kind = failure.get('kind', outcome)
+        if attempt == max_attempts:
+            break
+        if kind not in config.RETRY_POLICY['RETRY_ON']:
+            logging.info(f"Failure type '{kind}' is not retryable. Giving up on '{loggable_user}'.")
+            break
+
+        delay = retry_delay(config, attempt)
+        logging.info(f"Retrying '{loggable_user}' after {kind} in {delay:.1f}s...")
+        with timed_phase(timings, 'retry'):
+            time.sleep(delay)
+            try:
+                reload_messages_page(config, driver, conversation_index)
+            except WebDriverException as e:
+                logging.error(f"Reloading the messages page failed: {type(e).__name__}. Giving up on '{loggable_user}'.")
+                break
+    return outcome
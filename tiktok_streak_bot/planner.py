@@ -0,0 +1,120 @@
+import math
+import logging
+from datetime import time as dt_time, timedelta
+
+from .metrics import publish_plan
+from .scheduler import utc_now, slot_at, next_slot_after
+
+
+# Everything a run does before its first user. The rest is per-user time plus the pauses between users.
+SETUP_PHASES = ('startup', 'session_check', 'cookies', 'navigation', 'passkey_popup', 'list_ready', 'http_setup')
+PLANNER_PERCENTILE = 90
+# Used until the journal has timings for an account.
+DEFAULT_SETUP_SECONDS = 60.0
+DEFAULT_USER_SECONDS = 30.0
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * pct / 100) - 1)]
+
+def load_timing_history(config, account_name):
+    # sqlite3 is only loaded once there is something to plan.
+    from .journal import journal_timing_history
+
+    return journal_timing_history(config, account_name, config.PLANNER_HISTORY_RUNS)
+
+def predict_run(config, account, users, history=None):
+    if history is None:
+        history = load_timing_history(config, account['NAME'])
+    setup_samples = [sum(run['phases'].get(phase, 0.0) for phase in SETUP_PHASES) for run in history]
+    user_samples = [seconds for run in history for seconds in run['users'].values()]
+    # Tabbed runs pause between waves only, so spread the pauses over the users instead of counting them.
+    pause_samples = [run['phases'].get('between_users', 0.0) / (len(run['users']) - 1) for run in history if len(run['users']) > 1]
+
+    setup_seconds = percentile(setup_samples, PLANNER_PERCENTILE) if setup_samples else DEFAULT_SETUP_SECONDS
+    unknown_user_seconds = percentile(user_samples, PLANNER_PERCENTILE) if user_samples else DEFAULT_USER_SECONDS
+    if pause_samples:
+        pause_seconds = percentile(pause_samples, PLANNER_PERCENTILE)
+    elif config.LATENCY_BUDGET_MODE:
+        pause_seconds = config.MIN_HUMAN_JITTER_SECONDS * 2
+    else:
+        pause_seconds = 10.0
+
+    user_seconds = {}
+    for user in users:
+        samples = [run['users'][user.lower()] for run in history if user.lower() in run['users']]
+        user_seconds[user] = percentile(samples, PLANNER_PERCENTILE) if samples else unknown_user_seconds
+    return {
+        "account": account['NAME'],
+        "history_runs": len(history),
+        "setup_seconds": setup_seconds,
+        "pause_seconds": pause_seconds,
+        "user_seconds": user_seconds,
+        "predicted_seconds": setup_seconds + sum(user_seconds.values()) + pause_seconds * max(0, len(users) - 1),
+    }
+
+def order_users(prediction, users):
+    # Quickest first: the total is the same in any order, but if the run overruns, as many streaks as possible are already safe.
+    return sorted(users, key=lambda user: prediction['user_seconds'][user])
+
+def streak_day_start(account, deadline):
+    # Local midnight of the day the deadline closes. A message sent before it counts for the day before.
+    tz = account['TIMEZONE']
+    last_moment = deadline - timedelta(microseconds=1)
+    local_day = last_moment.astimezone(tz).date() if tz else last_moment.astimezone().date()
+    return slot_at(local_day, dt_time(0, 0), tz)
+
+def plan_run(config, account, users, slot, now):
+    prediction = predict_run(config, account, users)
+    deadline = next_slot_after(account['DEADLINE'], account['TIMEZONE'], slot)
+    latest_start = deadline - timedelta(minutes=config.DEADLINE_SAFETY_MARGIN_MINUTES, seconds=prediction['predicted_seconds'])
+    # Earlier than the slot only when the run needs it, never before the deadline's day or now, and never later than the slot:
+    # a deadline on the next calendar day puts its day start after an evening slot.
+    start_at = min(slot, max(latest_start, now, streak_day_start(account, deadline)))
+    return dict(
+        prediction,
+        users=order_users(prediction, users),
+        slot=slot,
+        deadline=deadline,
+        start_at=start_at,
+        slack_seconds=(latest_start - start_at).total_seconds(),
+    )
+
+def log_plan(name, plan):
+    def local(moment):
+        return moment.astimezone().strftime('%Y-%m-%d %H:%M')
+
+    basis = f"{plan['history_runs']} past run(s)" if plan['history_runs'] else "defaults, no run history yet"
+    logging.info(f"Plan for '{name}': {len(plan['users'])} user(s), predicted {plan['predicted_seconds'] / 60:.1f} minutes "
+                 f"(p{PLANNER_PERCENTILE} of {basis}), deadline {local(plan['deadline'])}.")
+    if plan['slack_seconds'] < 0:
+        logging.critical(f"DEADLINE ALERT for '{name}': starting at {local(plan['start_at'])}, the run is predicted to overrun the deadline "
+                         f"and safety margin by {-plan['slack_seconds'] / 60:.1f} minutes. Trim TARGET_USERS, speed the run up or move SEND_DEADLINE_HM.")
+    elif plan['start_at'] < plan['slot']:
+        logging.warning(f"'{name}' starts at {local(plan['start_at'])} instead of {local(plan['slot'])} to finish before the deadline.")
+
+def plan_jobs(config, jobs, now):
+    # Sets each job's start time: its send time, or earlier when the predicted run would not finish before the deadline.
+    for job in jobs:
+        account = job['account']
+        if account['DEADLINE'] is None:
+            job['start_at'] = job['next_slot']
+            job['plan'] = None
+            continue
+        previous = job['plan']
+        plan = plan_run(config, account, account['TARGET_USERS'], job['next_slot'], now)
+        job['plan'] = plan
+        job['start_at'] = plan['start_at']
+        publish_plan(config, plan)
+        if previous is None or previous['slot'] != plan['slot'] or previous['start_at'] != plan['start_at'] or (previous['slack_seconds'] < 0) != (plan['slack_seconds'] < 0):
+            log_plan(job['key'], plan)
+
+def plan_account_run(config, account, users):
+    # Orders the users of a run that starts now, and alerts before sending if it can no longer make the deadline.
+    if account['DEADLINE'] is None or not users:
+        return users
+    now = utc_now()
+    plan = plan_run(config, account, users, now, now)
+    log_plan(account['NAME'], plan)
+    publish_plan(config, plan)
+    return plan['users']
@@ -0,0 +1,252 @@
+import time
+import cProfile
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from selenium.common.exceptions import TimeoutException
+
+from .config import get_accounts
+from .logs import log_fields
+from .metrics import timed_phase, log_phase_timings, new_run_metrics, track_round_trips, export_run_metrics, take_profile_request, write_profile
+from .journal import journal_day, journal_sent_users, journal_record, journal_record_timings
+from .planner import plan_account_run
+from .browser import (managed_webdriver, get_profile_dir, is_session_logged_in, load_cookies, measure_page_load, report_network_usage,
+                      start_memory_watchdog, stop_memory_watchdog, memory_over_ceiling)
+from .pages import CircuitBreakerOpen, pause_duration, handle_passkey_popup, wait_for_selector, wait_for_ready, any_selector_xpath
+from .transports import TransportUnavailable, DeliveryUnconfirmed, BrowserTransport, TabbedBrowserTransport, HttpTransport
+
+
+def run_bot(config, account=None):
+    if account is None:
+        account = get_accounts(config)[0]
+    profiler = cProfile.Profile() if take_profile_request() else None
+    if profiler:
+        logging.info("cProfile enabled for this run.")
+        profiler.enable()
+    try:
+        with log_fields(account=account['NAME']):
+            return run_account(config, account)
+    finally:
+        if profiler:
+            profiler.disable()
+            write_profile(config, profiler, account['NAME'])
+
+def send_to_users(config, transport, users, account, run_day, summary, metrics, timings, fallback=None, recycle=None):
+    consecutive_failures = 0
+    for i, user in enumerate(users):
+        loggable_user = ''.join(c for c in user if c.isprintable())
+        logging.info(f"--- Processing user: '{loggable_user}' ({transport.name}) ---")
+        user_started = time.perf_counter()
+        try:
+            with log_fields(user=loggable_user):
+                outcome = transport.send(user)
+        except TransportUnavailable as e:
+            if fallback is None:
+                raise
+            logging.warning(f"The {transport.name} transport stopped working: {e}")
+            fallback.extend(users[i:])
+            return
+        except DeliveryUnconfirmed as e:
+            logging.warning(f"The {transport.name} transport can't tell whether '{loggable_user}' got the message ({e}). Not sending it again today.")
+            outcome = 'unconfirmed'
+        else:
+            if outcome != 'sent' and fallback is not None:
+                logging.warning(f"The {transport.name} transport could not deliver to '{loggable_user}' ({outcome}). Leaving it to the browser.")
+                fallback.append(user)
+                continue
+
+        metrics['users'].append({"user": user, "outcome": outcome, "transport": transport.name, "seconds": time.perf_counter() - user_started})
+        journal_record(config, account['NAME'], run_day, user, outcome)
+        summary['results'][user] = outcome
+        if outcome == 'sent':
+            summary['sent'] += 1
+            consecutive_failures = 0
+            logging.info(f"Message successfully sent to '{loggable_user}'.")
+        elif outcome == 'unconfirmed':
+            summary['unconfirmed'] += 1
+        else:
+            summary['failed'] += 1
+            consecutive_failures += 1
+            logging.warning(f"Giving up on '{loggable_user}' for this run ({outcome}).")
+            if config.CIRCUIT_BREAKER_THRESHOLD and consecutive_failures >= config.CIRCUIT_BREAKER_THRESHOLD:
+                raise CircuitBreakerOpen(f"{consecutive_failures} users in a row failed. Aborting the run.")
+
+        if recycle is not None and i < len(users) - 1 and recycle():
+            return users[i + 1:]
+
+        if len(users) > 1 and i < len(users) - 1 and transport.pause_before_next():
+            wait_time = pause_duration(config, 5, 10)
+            logging.info(f"Waiting {wait_time:.1f} seconds before next user...")
+            with timed_phase(timings, 'between_users'):
+                time.sleep(wait_time)
+    return []
+
+def send_over_http(config, account, users, run_day, summary, metrics, timings):
+    fallback = []
+    try:
+        with timed_phase(timings, 'http_setup'):
+            transport = HttpTransport(config, account, metrics)
+    except TransportUnavailable as e:
+        logging.warning(f"HTTP transport unavailable: {e}")
+        fallback = list(users)
+    else:
+        logging.info(f"Sending to {len(users)} target users over HTTP ({transport.send_url}).")
+        send_to_users(config, transport, users, account, run_day, summary, metrics, timings, fallback)
+    if fallback:
+        logging.warning(f"Falling back to the browser for {len(fallback)} user(s): {', '.join(fallback)}")
+    return fallback
+
+def send_over_browser(config, account, users, run_day, summary, metrics, timings):
+    remaining = run_browser_session(config, account, users, run_day, summary, metrics, timings)
+    while remaining:
+        logging.info(f"Starting a fresh browser for the remaining {len(remaining)} user(s)...")
+        remaining = run_browser_session(config, account, remaining, run_day, summary, metrics, timings)
+
+def run_browser_session(config, account, users, run_day, summary, metrics, timings):
+    profile_dir = get_profile_dir(config, account['NAME'])
+    keep_alive = bool(profile_dir and config.REUSE_BROWSER)
+
+    startup_started = time.perf_counter()
+    with managed_webdriver(config, headless=config.HEADLESS_MODE, user_agent=config.USER_AGENT, profile_dir=profile_dir, keep_alive=keep_alive) as driver:
+        timings['startup'] = timings.get('startup', 0.0) + time.perf_counter() - startup_started
+        track_round_trips(driver, metrics)
+        logging.info("Browser opened and managed by context.")
+
+        with timed_phase(timings, 'session_check'):
+            logged_in = bool(profile_dir) and is_session_logged_in(config, driver)
+        if logged_in:
+            logging.info("Skipping cookie injection for the logged-in profile.")
+        else:
+            with timed_phase(timings, 'cookies'):
+                if not load_cookies(config, driver, account['COOKIES_FILE']):
+                    raise Exception("Failed to load cookies, stopping bot run.")
+
+            with timed_phase(timings, 'navigation'):
+                logging.info(f"Navigating to '{config.TIKTOK_MESSAGES_URL}'...")
+                driver.get(config.TIKTOK_MESSAGES_URL)
+
+        with timed_phase(timings, 'passkey_popup'):
+            handle_passkey_popup(config, driver)
+
+        with timed_phase(timings, 'list_ready'):
+            logging.info("Waiting for message list container...")
+            try:
+                wait_for_selector(config, driver, 'message_list', timeout=35)
+                logging.info("Message list container loaded.")
+            except TimeoutException:
+                logging.warning("Message list container not found. This might cause issues.")
+            wait_for_ready(config, driver, any_selector_xpath('conversation_item'), 3, 6)
+        page_load = measure_page_load(driver) if config.NETWORK_REPORT else None
+
+        if not users:
+            logging.error("Target user list is empty. Nothing to do. Exiting run.")
+            return []
+
+        logging.info(f"Will attempt to send messages to {len(users)} target users: {', '.join(users)}")
+        if config.TAB_CONCURRENCY > 1 and len(users) > 1:
+            transport = TabbedBrowserTransport(config, driver, account, users, timings, config.TAB_CONCURRENCY)
+        else:
+            transport = BrowserTransport(config, driver, account, users, timings)
+        watchdog = start_memory_watchdog(config, driver)
+
+        def recycle():
+            driver.recycle_requested = memory_over_ceiling(config, watchdog)
+            return driver.recycle_requested
+
+        try:
+            remaining = send_to_users(config, transport, users, account, run_day, summary, metrics, timings, recycle=recycle)
+        finally:
+            stop_memory_watchdog(watchdog, metrics)
+            transport.close()
+        if config.NETWORK_REPORT:
+            report_network_usage(config, driver, metrics, page_load)
+        return remaining
+
+def run_account(config, account):
+    run_day = journal_day(account)
+    already_sent = journal_sent_users(config, account['NAME'], run_day)
+    users_to_message = [user for user in account['TARGET_USERS'] if user.lower() not in already_sent]
+    summary = {"account": account['NAME'], "sent": 0, "failed": 0, "unconfirmed": 0, "skipped": len(account['TARGET_USERS']) - len(users_to_message), "total": len(account['TARGET_USERS']), "results": {}}
+
+    if config.TEST_MODE:
+        logging.warning("--- TEST MODE (Instant Run) ACTIVE ---")
+    else:
+        logging.info("--- Normal Mode (Scheduled Run) Starting ---")
+
+    if summary['skipped']:
+        logging.info(f"{summary['skipped']} user(s) already received a message on {run_day} according to the run journal. Skipping them.")
+        if not users_to_message:
+            logging.info("Every target user is already done for today. Nothing to do.")
+            return summary
+    users_to_message = plan_account_run(config, account, users_to_message)
+
+    metrics = new_run_metrics(account['NAME'])
+    timings = metrics['phases']
+    try:
+        with log_fields(run_id=metrics['run_id']):
+            browser_users = users_to_message
+            if config.TRANSPORT == "http" and users_to_message:
+                browser_users = send_over_http(config, account, users_to_message, run_day, summary, metrics, timings)
+            if browser_users or not users_to_message:
+                send_over_browser(config, account, browser_users, run_day, summary, metrics, timings)
+            if users_to_message:
+                logging.info(f"Finished processing. {summary['sent']}/{len(users_to_message)} messages successfully sent.")
+
+    except CircuitBreakerOpen as e:
+        logging.critical(f"Circuit breaker opened: {e}")
+        summary['failed'] = len(users_to_message) - summary['sent'] - summary['unconfirmed']
+    except Exception as e:
+        logging.error("Critical error during bot execution:")
+        logging.exception(e)
+        summary['failed'] = len(users_to_message) - summary['sent'] - summary['unconfirmed']
+
+    log_phase_timings(config, timings)
+    export_run_metrics(config, metrics, summary)
+    if metrics['users']:
+        journal_record_timings(config, account['NAME'], run_day, metrics)
+    return summary
+
+def run_account_worker(config, account):
+    threading.current_thread().name = account['NAME']
+    try:
+        return run_bot(config, account)
+    except SystemExit:
+        logging.critical(f"Account '{account['NAME']}' aborted during browser startup.")
+        return {"account": account['NAME'], "sent": 0, "failed": len(account['TARGET_USERS']), "unconfirmed": 0, "skipped": 0, "total": len(account['TARGET_USERS'])}
+
+def run_all_accounts(config, accounts=None):
+    if accounts is None:
+        accounts = get_accounts(config)
+    if not config.ACCOUNTS:
+        return [run_bot(config, accounts[0])]
+
+    if not accounts:
+        logging.error("No valid accounts found in ACCOUNTS. Nothing to do.")
+        return []
+
+    workers = min(config.MAX_PARALLEL_ACCOUNTS, len(accounts))
+    logging.info(f"Running {len(accounts)} accounts with {workers} parallel browser sessions...")
+    start_time = time.time()
+
+    summaries = [None] * len(accounts)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_account_worker, config, account): i for i, account in enumerate(accounts)}
+        for future in as_completed(futures):
+            i = futures[future]
+            account = accounts[i]
+            try:
+                summaries[i] = future.result()
+            except Exception as e:
+                logging.error(f"Unhandled error in worker for account '{account['NAME']}': {e}")
+                summaries[i] = {"account": account['NAME'], "sent": 0, "failed": len(account['TARGET_USERS']), "unconfirmed": 0, "skipped": 0, "total": len(account['TARGET_USERS'])}
+
+    logging.info(f"--- Combined Summary ({time.time() - start_time:.1f}s) ---")
+    for item in summaries:
+        logging.info(f"{item['account']}: {item['sent']} sent, {item['failed']} failed, "
+                     + (f"{item['unconfirmed']} unconfirmed, " if item['unconfirmed'] else "")
+                     + f"{item['skipped']} already done (of {item['total']}).")
+    total_sent = sum(item['sent'] for item in summaries)
+    total_failed = sum(item['failed'] for item in summaries)
+    logging.info(f"All accounts: {total_sent} sent, {total_failed} failed.")
+    return summaries
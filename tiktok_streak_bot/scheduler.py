@@ -0,0 +1,144 @@
+import time
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+from .config import get_accounts
+
+
+SCHEDULER_MAX_SLEEP_SECONDS = 900
+SCHEDULER_ON_TIME_GRACE_SECONDS = 120
+CLOCK_JUMP_TOLERANCE_SECONDS = 5
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+def slot_at(day, send_time, tz):
+    if tz is None:
+        return datetime.combine(day, send_time).astimezone().astimezone(timezone.utc)
+    return datetime.combine(day, send_time, tzinfo=tz).astimezone(timezone.utc)
+
+def next_slot_after(send_time, tz, after):
+    local_day = after.astimezone(tz).date() if tz else after.astimezone().date()
+    for offset in range(3):
+        slot = slot_at(local_day + timedelta(days=offset), send_time, tz)
+        if slot > after:
+            return slot
+    return slot_at(local_day + timedelta(days=3), send_time, tz)
+
+def load_scheduler_state(config):
+    try:
+        with open(config.SCHEDULER_STATE_FILE, 'r', encoding='utf-8') as f:
+            return {key: datetime.fromisoformat(value) for key, value in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.warning(f"Could not read scheduler state '{config.SCHEDULER_STATE_FILE}' ({e}). Missed runs before this start can't be caught up.")
+        return {}
+
+def save_scheduler_state(config, jobs):
+    state = {job['key']: job['last_slot'].isoformat() for job in jobs if job['last_slot']}
+    try:
+        with open(config.SCHEDULER_STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=4)
+    except IOError as e:
+        logging.warning(f"Could not write scheduler state '{config.SCHEDULER_STATE_FILE}': {e}")
+
+def build_schedule_jobs(accounts, state, now):
+    jobs = []
+    for account in accounts:
+        for send_time in account['SEND_TIMES']:
+            key = f"{account['NAME']}@{send_time.strftime('%H:%M')}"
+            last_slot = state.get(key)
+            # A slot that was started early by the deadline planner can still be ahead of now.
+            next_slot = next_slot_after(send_time, account['TIMEZONE'], last_slot if last_slot is not None else now)
+            jobs.append({"key": key, "account": account, "send_time": send_time, "last_slot": last_slot, "next_slot": next_slot,
+                         "start_at": next_slot, "plan": None})
+    return jobs
+
+def job_start(job):
+    return min(job['start_at'], job['next_slot'])
+
+def sleep_until(deadline, wake=None):
+    while True:
+        remaining = (deadline - utc_now()).total_seconds()
+        if remaining <= 0:
+            return
+        chunk = min(remaining, SCHEDULER_MAX_SLEEP_SECONDS)
+        wall_started = time.time()
+        monotonic_started = time.monotonic()
+        if wake is None:
+            time.sleep(chunk)
+        elif wake.wait(chunk):
+            return
+        # time.sleep() runs on the monotonic clock, which stops during suspend; compare against wall time.
+        drift = (time.time() - wall_started) - (time.monotonic() - monotonic_started)
+        if abs(drift) > CLOCK_JUMP_TOLERANCE_SECONDS:
+            logging.warning(f"Wall clock moved {drift:+.0f}s relative to the monotonic clock (suspend or clock change). Re-checking the schedule.")
+            return
+
+def collect_due_accounts(config, jobs, now):
+    due_accounts = {}
+    for job in jobs:
+        if job['next_slot'] > now:
+            if job_start(job) <= now:
+                logging.info(f"Schedule '{job['key']}' is due {(job['next_slot'] - now).total_seconds() / 60:.0f} minutes early to finish before its deadline.")
+                due_accounts[job['account']['NAME']] = job['account']
+                job['last_slot'] = job['next_slot']
+                job['next_slot'] = job['start_at'] = next_slot_after(job['send_time'], job['account']['TIMEZONE'], job['next_slot'])
+            continue
+
+        missed_slots = 0
+        slot = job['next_slot']
+        latest_slot = slot
+        while slot <= now:
+            latest_slot = slot
+            missed_slots += 1
+            slot = next_slot_after(job['send_time'], job['account']['TIMEZONE'], slot)
+        lateness = (now - latest_slot).total_seconds()
+
+        if missed_slots > 1:
+            logging.warning(f"Schedule '{job['key']}': {missed_slots - 1} earlier run(s) were missed and will not be repeated.")
+        if lateness <= SCHEDULER_ON_TIME_GRACE_SECONDS:
+            logging.info(f"Schedule '{job['key']}' is due.")
+            due_accounts[job['account']['NAME']] = job['account']
+        elif config.CATCH_UP_POLICY == "once" and lateness <= config.CATCH_UP_WINDOW_MINUTES * 60:
+            logging.warning(f"Schedule '{job['key']}' was missed by {lateness / 60:.0f} minutes. Catching up now.")
+            due_accounts[job['account']['NAME']] = job['account']
+        else:
+            logging.warning(f"Schedule '{job['key']}' was missed by {lateness / 60:.0f} minutes. Skipping it (CATCH_UP_POLICY: {config.CATCH_UP_POLICY}).")
+
+        job['last_slot'] = latest_slot
+        job['next_slot'] = job['start_at'] = slot
+    return list(due_accounts.values())
+
+def run_scheduler(config):
+    # The planner builds on the slot helpers in this module.
+    from .planner import plan_jobs
+
+    jobs = build_schedule_jobs(get_accounts(config), load_scheduler_state(config), utc_now())
+    if not jobs:
+        logging.error("No scheduled runs configured. Exiting scheduler.")
+        return
+    logging.info(f"Normal mode enabled. {len(jobs)} schedule(s) configured (CATCH_UP_POLICY: {config.CATCH_UP_POLICY}).")
+
+    while True:
+        now = utc_now()
+        plan_jobs(config, jobs, now)
+        due_accounts = collect_due_accounts(config, jobs, now)
+        if due_accounts:
+            logging.info(f"Running bot in normal mode for: {', '.join(a['NAME'] for a in due_accounts)}")
+            # Selenium is only needed once something is due, not while the scheduler waits for the first slot.
+            from .runner import run_all_accounts
+            try:
+                run_all_accounts(config, due_accounts)
+            except Exception as e:
+                logging.error(f"FATAL: An unhandled exception escaped from run_bot: {e}")
+            finally:
+                save_scheduler_state(config, jobs)
+            continue
+
+        next_job = min(jobs, key=job_start)
+        wait_seconds = (job_start(next_job) - now).total_seconds()
+        logging.info(f"Next run: '{next_job['key']}' at {job_start(next_job).astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')} (in {wait_seconds / 3600:.1f}h).")
+        sleep_until(job_start(next_job))
@@ -0,0 +1,208 @@
+import json
+import logging
+import threading
+from urllib.parse import urljoin, urlparse
+
+import urllib3
+from selenium.common.exceptions import WebDriverException
+
+from .browser import apply_lean_mode
+from .cookies import load_normalized_cookies, drop_expired_cookies, cookie_header
+from .metrics import timed_phase
+from .pages import new_conversation_index, log_conversation_index_stats, load_conversation_urls, process_user
+
+
+class TransportUnavailable(Exception):
+    pass
+
+class DeliveryUnconfirmed(Exception):
+    # The request went out but no answer came back: the message may have been delivered, so it must not be sent again.
+    pass
+
+class MessageTransport:
+    name = None
+
+    def send(self, user):
+        # Returns 'sent', 'send_failed' or 'not_found'. Raises TransportUnavailable when the transport itself stops working and
+        # DeliveryUnconfirmed when a message may or may not have gone out.
+        raise NotImplementedError
+
+    def pause_before_next(self):
+        return True
+
+    def close(self):
+        pass
+
+class BrowserTransport(MessageTransport):
+    name = "browser"
+
+    def __init__(self, config, driver, account, users, timings, conversation_urls=None):
+        self.config = config
+        self.driver = driver
+        self.account = account
+        self.timings = timings
+        self.conversation_index = new_conversation_index(users)
+        if conversation_urls is None:
+            conversation_urls = load_conversation_urls(config, account['NAME'])
+            cached_count = sum(1 for user in users if user.lower() in conversation_urls)
+            if cached_count:
+                logging.info(f"{cached_count}/{len(users)} target users have a cached conversation URL.")
+        self.conversation_urls = conversation_urls
+
+    def send(self, user):
+        return process_user(self.config, self.driver, user, self.account, self.conversation_index, self.timings, self.conversation_urls)
+
+    def close(self):
+        log_conversation_index_stats(self.conversation_index)
+
+class TabbedBrowserTransport(MessageTransport):
+    # WebDriver drives one tab at a time, so the parallelism is in the page loads: a wave of tabs starts loading
+    # together, then each tab is worked on in turn while the others finish loading in the background.
+    name = "browser"
+
+    def __init__(self, config, driver, account, users, timings, tab_count):
+        self.config = config
+        self.driver = driver
+        self.account = account
+        self.users = users
+        self.timings = timings
+        self.tab_count = tab_count
+        self.cursor = 0
+        self.tabs = {}
+        self.home_handle = driver.current_window_handle
+        self.home_transport = BrowserTransport(config, driver, account, users, timings)
+        self.conversation_urls = self.home_transport.conversation_urls
+
+    def open_wave(self, start):
+        wave = self.users[start:start + self.tab_count]
+        self.cursor = start + len(wave)
+        logging.info(f"Opening {len(wave)} conversation tab(s) at once: {', '.join(wave)}")
+        with timed_phase(self.timings, 'open_tabs'):
+            for user in wave:
+                url = self.conversation_urls.get(user.lower()) or self.config.TIKTOK_MESSAGES_URL
+                try:
+                    self.driver.switch_to.new_window('tab')
+                    self.tabs[user] = self.driver.current_window_handle
+                    if self.config.LEAN_MODE:
+                        # Network.setBlockedURLs only applies to the tab it was sent to.
+                        apply_lean_mode(self.config, self.driver)
+                    # Unlike driver.get(), this returns right away and lets the tab load in the background.
+                    self.driver.execute_script("window.location.href = arguments[0];", url)
+                except WebDriverException as e:
+                    logging.warning(f"Could not open a tab for '{user}' ({type(e).__name__}). It will use the main tab.")
+            self.switch_to(self.home_handle)
+
+    def switch_to(self, handle):
+        try:
+            self.driver.switch_to.window(handle)
+            return True
+        except WebDriverException:
+            return False
+
+    def close_tab(self, handle):
+        if self.switch_to(handle):
+            try:
+                self.driver.close()
+            except WebDriverException:
+                pass
+        self.switch_to(self.home_handle)
+
+    def send(self, user):
+        if user not in self.tabs and user in self.users[self.cursor:]:
+            self.open_wave(self.users.index(user, self.cursor))
+        handle = self.tabs.pop(user, None)
+        if handle is None or not self.switch_to(handle):
+            self.switch_to(self.home_handle)
+            return self.home_transport.send(user)
+        try:
+            # Each tab gets its own conversation index: element references never cross documents.
+            return BrowserTransport(self.config, self.driver, self.account, [user], self.timings, self.conversation_urls).send(user)
+        except WebDriverException as e:
+            logging.error(f"The tab for '{user}' failed ({type(e).__name__}). The other tabs are not affected.")
+            return 'send_failed'
+        finally:
+            self.close_tab(handle)
+
+    def pause_before_next(self):
+        # Pace between waves, not between the tabs of one wave.
+        return not self.tabs
+
+    def close(self):
+        for handle in list(self.tabs.values()):
+            self.close_tab(handle)
+        self.tabs.clear()
+        self.home_transport.close()
+
+_http_pool = None
+_http_pool_lock = threading.Lock()
+
+def get_http_pool(config):
+    # One pool for the whole process, so every account and run reuses the same keep-alive connections.
+    global _http_pool
+    with _http_pool_lock:
+        if _http_pool is None:
+            # Only connection failures are retried: a POST that reached the server may already have sent the message.
+            retries = urllib3.Retry(total=2, connect=2, read=0, status=0, other=0, redirect=False, backoff_factor=0.5)
+            _http_pool = urllib3.PoolManager(maxsize=config.HTTP_TRANSPORT['POOL_SIZE'], block=False, retries=retries)
+        return _http_pool
+
+class HttpTransport(MessageTransport):
+    name = "http"
+
+    def __init__(self, config, account, metrics):
+        self.config = config
+        # Never guessed from TIKTOK_MESSAGES_URL: the session cookies only go to an endpoint that was configured on purpose.
+        base_url = config.HTTP_TRANSPORT['BASE_URL']
+        if not base_url:
+            raise TransportUnavailable("HTTP_TRANSPORT.BASE_URL is not set.")
+        self.send_url = urljoin(base_url, config.HTTP_TRANSPORT['SEND_PATH'])
+        self.message = account['MESSAGE_TO_SEND']
+        self.metrics = metrics
+        try:
+            cookies, _ = load_normalized_cookies(config, account['COOKIES_FILE'])
+        except (OSError, ValueError) as e:
+            raise TransportUnavailable(f"Could not read the cookies file: {e}")
+        cookies = drop_expired_cookies(cookies)
+        if not any(cookie['name'] == 'sessionid' for cookie in cookies):
+            raise TransportUnavailable("No valid 'sessionid' cookie.")
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "User-Agent": config.USER_AGENT,
+            "Referer": config.TIKTOK_MESSAGES_URL,
+            "Cookie": cookie_header(cookies, (urlparse(self.send_url).hostname or '').lower()),
+        }
+        csrf_token = next((cookie['value'] for cookie in cookies if cookie['name'] == 'tt_csrf_token'), None)
+        if csrf_token:
+            self.headers["tt-csrf-token"] = csrf_token
+
+    def send(self, user):
+        body = json.dumps({"to": user, "text": self.message}).encode('utf-8')
+        self.metrics['http_requests'] += 1
+        try:
+            with timed_phase(self.metrics['phases'], 'http_send'):
+                response = get_http_pool(self.config).request("POST", self.send_url, body=body, headers=self.headers,
+                                                              timeout=urllib3.Timeout(total=self.config.HTTP_TRANSPORT['TIMEOUT_SECONDS']))
+        except urllib3.exceptions.HTTPError as e:
+            # Connection errors are retried inside the pool; a read timeout means the POST already reached the server.
+            if isinstance(getattr(e, 'reason', e), urllib3.exceptions.ReadTimeoutError):
+                raise DeliveryUnconfirmed(f"No answer within {self.config.HTTP_TRANSPORT['TIMEOUT_SECONDS']:.0f}s.")
+            raise TransportUnavailable(f"{type(e).__name__}: {e}")
+
+        try:
+            payload = json.loads(response.data or b"{}")
+        except ValueError:
+            payload = None
+        # Anything that isn't the endpoint's own JSON answer (login redirects, HTML error pages) means the endpoint isn't usable.
+        if not isinstance(payload, dict):
+            raise TransportUnavailable(f"Unexpected non-JSON response (HTTP {response.status}).")
+        if response.status in (401, 403):
+            raise TransportUnavailable(f"Session rejected (HTTP {response.status}).")
+        if response.status == 429 or response.status >= 500:
+            raise TransportUnavailable(f"Endpoint unavailable (HTTP {response.status}).")
+        if response.status == 404:
+            return 'not_found'
+        if 200 <= response.status < 300 and payload.get('status') == 'sent':
+            return 'sent'
+        logging.warning(f"HTTP transport could not send to '{user}': HTTP {response.status} {payload.get('error', '')}".rstrip())
+        return 'send_failed'